@@ -0,0 +1,183 @@
+import json
+import multiprocessing
+import os
+import queue
+import random
+import sys
+import time
+
+from crossword import Crossword
+from generate import CrosswordCreator
+
+# Corpus configuration: grid sizes (height, width), fraction of open
+# squares, and number of words in each generated word list
+SIZES = [(5, 5), (7, 7), (9, 9), (11, 11)]
+DENSITIES = [0.5, 0.7]
+WORD_COUNTS = [500, 5000]
+WORD_LENGTHS = (2, 11)
+GRIDS_PER_SETTING = 2
+SEED = 0
+
+# Seconds a solver may spend on one crossword before it is abandoned
+TIME_LIMIT = 30
+
+# Largest number of solutions the counting mode counts up to
+COUNT_LIMIT = 10000
+
+# Solver modes, each mapping a CrosswordCreator to its result
+MODES = {
+    "backtrack": lambda creator: creator.solve("backtrack") is not None,
+    "backjump": lambda creator: creator.solve("backjump") is not None,
+    "count": lambda creator: creator.count_solutions(limit=COUNT_LIMIT)
+}
+
+# Approximate English letter frequencies, so random words can cross
+LETTERS = "ETAOINSHRDLCUMWFGYPBVKJXQZ"
+WEIGHTS = [12.0, 9.1, 8.1, 7.7, 7.3, 7.0, 6.3, 6.1, 6.0, 4.3, 4.0, 2.8, 2.9,
+           2.4, 2.1, 2.2, 2.0, 2.1, 1.8, 1.5, 1.1, 0.7, 0.2, 0.2, 0.1, 0.1]
+
+
+def generate_structure(height, width, density, rng):
+    """
+    Return the lines of a random crossword structure of the given size,
+    in which roughly `density` of the squares are open ("_") and the
+    rest are blocked ("#").
+    """
+    return [
+        "".join("_" if rng.random() < density else "#" for _ in range(width))
+        for _ in range(height)
+    ]
+
+
+def generate_words(count, rng, lengths=WORD_LENGTHS):
+    """
+    Return a sorted list of `count` distinct random words, with lengths
+    drawn uniformly from the inclusive range `lengths`.
+    """
+    words = set()
+    while len(words) < count:
+        length = rng.randint(*lengths)
+        words.add("".join(rng.choices(LETTERS, weights=WEIGHTS, k=length)))
+    return sorted(words)
+
+
+def generate_corpus(directory, seed=SEED):
+    """
+    Write a benchmark corpus of structure and word files to `directory`.
+    Return a list of cases, each a dictionary of: name, structure file,
+    words file, and the settings used to generate them.
+    """
+    rng = random.Random(seed)
+    os.makedirs(directory, exist_ok=True)
+
+    # Word lists
+    word_files = dict()
+    for count in WORD_COUNTS:
+        word_files[count] = os.path.join(directory, f"words{count}.txt")
+        with open(word_files[count], "w") as f:
+            f.write("\n".join(generate_words(count, rng)) + "\n")
+
+    # Structures, each paired with every word list
+    cases = []
+    for height, width in SIZES:
+        for density in DENSITIES:
+            for k in range(GRIDS_PER_SETTING):
+                name = f"grid{height}x{width}-{density}-{k}"
+                structure = os.path.join(directory, f"{name}.txt")
+                with open(structure, "w") as f:
+                    lines = generate_structure(height, width, density, rng)
+                    f.write("\n".join(lines) + "\n")
+
+                for count in WORD_COUNTS:
+                    cases.append({
+                        "name": f"{name}-words{count}",
+                        "structure": structure,
+                        "words": word_files[count],
+                        "height": height,
+                        "width": width,
+                        "density": density,
+                        "word_count": count
+                    })
+
+    return cases
+
+
+def solve_case(case, mode, results):
+    """
+    Solve one corpus case with solver `mode`, putting the result,
+    elapsed time, and solver statistics onto the queue `results`.
+    """
+    crossword = Crossword(case["structure"], case["words"])
+    creator = CrosswordCreator(crossword)
+    start = time.perf_counter()
+    result = MODES[mode](creator)
+    elapsed = time.perf_counter() - start
+    results.put({
+        "result": result,
+        "time": elapsed,
+        "variables": len(crossword.variables),
+        "stats": creator.stats.as_dict()
+    })
+
+
+def run_case(case, mode, time_limit=TIME_LIMIT):
+    """
+    Time solver `mode` on `case` in a separate process, abandoning it
+    after `time_limit` seconds. Return a dictionary describing the run.
+    """
+    results = multiprocessing.Queue()
+    process = multiprocessing.Process(
+        target=solve_case, args=(case, mode, results)
+    )
+    process.start()
+    try:
+        outcome = results.get(timeout=time_limit)
+    except queue.Empty:
+        outcome = {"result": None, "time": None, "timeout": True}
+    process.join(1)
+    if process.is_alive():
+        process.terminate()
+        process.join()
+    outcome.update({"case": case["name"], "mode": mode})
+    return outcome
+
+
+def run(cases, modes=MODES, time_limit=TIME_LIMIT):
+    """
+    Time every solver in `modes` on every case in `cases`, printing one
+    line per run. Return the list of runs.
+    """
+    runs = []
+    for case in cases:
+        for mode in modes:
+            result = run_case(case, mode, time_limit)
+            runs.append(result)
+            if result.get("timeout"):
+                print(f"{case['name']:32} {mode:10} timed out")
+            else:
+                counters = result["stats"]["counters"]
+                print(f"{case['name']:32} {mode:10} "
+                      f"{result['time']:9.4f}s "
+                      f"nodes={counters.get('nodes', 0):<8} "
+                      f"result={result['result']}")
+    return runs
+
+
+def main():
+
+    # Check usage
+    if len(sys.argv) not in [2, 3]:
+        sys.exit("Usage: python benchmark.py corpus_directory [results.json]")
+
+    # Generate corpus and time every solver mode on it
+    cases = generate_corpus(sys.argv[1])
+    runs = run(cases)
+
+    # Save results
+    if len(sys.argv) == 3:
+        with open(sys.argv[2], "w") as f:
+            json.dump(runs, f, indent=4)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,8 @@
+import functools
+
+from vocabulary import Vocabulary
+
+
 class Variable():
 
     ACROSS = "across"
@@ -57,9 +62,8 @@ class Crossword():
                         row.append(False)
                 self.structure.append(row)
 
-        # Save vocabulary list
-        with open(words_file) as f:
-            self.words = set(f.read().upper().splitlines())
+        # Save vocabulary list, bucketed by word length
+        self.vocabulary = Vocabulary.load(words_file)
 
         # Determine variable set
         self.variables = set()
@@ -125,6 +129,15 @@ class Crossword():
                         cells2.index(intersection)
                     )
 
+    @functools.cached_property
+    def words(self):
+        """Set of all words in the vocabulary, built on first access."""
+        return set(self.vocabulary)
+
+    def words_of_length(self, length):
+        """Return the (shared, read-only) bucket of words of `length`."""
+        return self.vocabulary.bucket(length)
+
     def neighbors(self, var):
         """Given a variable, return set of overlapping variables."""
         return set(
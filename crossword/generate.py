@@ -1,20 +1,31 @@
 import sys
 
 from crossword import *
+from stats import SolverStats, timed
+from vocabulary import Bucket
 
 
 class CrosswordCreator():
 
+    # Largest nogood (number of variable, word pairs) worth remembering
+    NOGOOD_SIZE = 3
+
     def __init__(self, crossword):
         """
         Create new CSP crossword generate.
         """
         self.crossword = crossword
         self.domains = {
-            var: self.crossword.words.copy()
+            var: self.crossword.words_of_length(var.length)
             for var in self.crossword.variables
         }
 
+        # Learned nogoods, indexed by each (variable, word) pair they contain
+        self.nogoods = dict()
+
+        # Counters and timers for the work done while solving
+        self.stats = SolverStats()
+
     def letter_grid(self, assignment):
         """
         Return 2D array representing a given assignment.
@@ -85,14 +96,26 @@ class CrosswordCreator():
 
         img.save(filename)
 
-    def solve(self):
+    @timed("solve")
+    def solve(self, mode="backtrack"):
         """
         Enforce node and arc consistency, and then solve the CSP.
+
+        `mode` selects the search algorithm: "backtrack" for chronological
+        backtracking, or "backjump" for conflict-directed backjumping
+        with nogood learning.
         """
+        if mode not in ("backtrack", "backjump"):
+            raise ValueError(f"unknown search mode {mode!r}")
+
         self.enforce_node_consistency()
-        self.ac3()
+        if not self.ac3():
+            return None
+        if mode == "backjump":
+            return self.backjump(dict())
         return self.backtrack(dict())
 
+    @timed("enforce_node_consistency")
     def enforce_node_consistency(self):
         """
         Update `self.domains` such that each variable is node-consistent.
@@ -101,6 +124,12 @@ class CrosswordCreator():
         """
 
         for variable in self.domains:
+
+            # Length buckets already satisfy the unary constraint
+            if isinstance(self.domains[variable], Bucket):
+                if self.domains[variable].length == variable.length:
+                    continue
+
             removeables = set()
 
             # Check if each word in the variable's domain matches its length
@@ -109,8 +138,7 @@ class CrosswordCreator():
                     removeables.add(word)
 
             # Remove all marked words from the domain of the variable
-
-            self.domains[variable] -= removeables
+            self.domains[variable] = set(self.domains[variable]) - removeables
 
     def revise(self, x, y):
         """
@@ -121,6 +149,7 @@ class CrosswordCreator():
         Return True if a revision was made to the domain of `x`; return
         False if no revision was made.
         """
+        self.stats.count("revise")
 
         if self.crossword.overlaps[x, y] is None:
             return False
@@ -128,24 +157,31 @@ class CrosswordCreator():
         i, j = self.crossword.overlaps[x, y]
         removeables = set()
 
+        # Letters that y can place on the overlapping square
+        letters = set()
+        for y_word in self.domains[y]:
+            letters.add(y_word[j])
+
         # Check for and record any conflicts
         for x_word in self.domains[x]:
-            conflict = True
-            for y_word in self.domains[y]:
-                if x_word[i] == y_word[j]:
-                    conflict = False
-
-            if conflict:
+            if x_word[i] not in letters:
                 removeables.add(x_word)
 
         # If there are conflicts, remove them from x's domain
         if len(removeables) != 0:
+
+            # Copy a shared length bucket before its first modification
+            if isinstance(self.domains[x], Bucket):
+                self.domains[x] = set(self.domains[x])
+
             for word in removeables:
                 self.domains[x].remove(word)
+            self.stats.count("revisions")
             return True
 
         return False
 
+    @timed("ac3")
     def ac3(self, arcs=None):
         """
         Update `self.domains` such that each variable is arc consistent.
@@ -194,6 +230,7 @@ class CrosswordCreator():
         Return True if `assignment` is consistent (i.e., words fit in crossword
         puzzle without conflicting characters); return False otherwise.
         """
+        self.stats.count("consistency_checks")
 
         # Ensure all words are distinct and have the correct length
         words = set()
@@ -228,6 +265,21 @@ class CrosswordCreator():
         The first value in the list, for example, should be the one
         that rules out the fewest values among the neighbors of `var`.
         """
+        # Tally the letters each unassigned neighbor can place on its
+        # overlap with var, so every neighbor's domain is read only once
+        tallies = []
+        for neighbor in self.crossword.neighbors(var):
+            # Only consider neighbors that are not already assigned
+            if neighbor not in assignment:
+                # Find overlap between var and neighbor
+                overlap = self.crossword.overlaps[var, neighbor]
+                if overlap != None:
+                    i, j = overlap
+                    letters = dict()
+                    for neighbor_value in self.domains[neighbor]:
+                        letters[neighbor_value[j]] = letters.get(neighbor_value[j], 0) + 1
+                    tallies.append((i, len(self.domains[neighbor]), letters))
+
         # Create a list to store each value and the number of conflicts it causes
         conflicts = []
 
@@ -235,18 +287,9 @@ class CrosswordCreator():
         for value in self.domains[var]:
             num_conflicts = 0
 
-            # Check each neighbor of var
-            for neighbor in self.crossword.neighbors(var):
-                # Only consider neighbors that are not already assigned
-                if neighbor not in assignment:
-                    # Find overlap between var and neighbor
-                    overlap = self.crossword.overlaps[var, neighbor]
-                    if overlap != None:
-                        i, j = overlap
-                        # Count how many values in the neighbor's domain are inconsistent
-                        for neighbor_value in self.domains[neighbor]:
-                            if value[i] != neighbor_value[j]:
-                                num_conflicts += 1
+            # Count how many values in each neighbor's domain are inconsistent
+            for i, size, letters in tallies:
+                num_conflicts += size - letters.get(value[i], 0)
 
             # Add the value and number of conflicts it causes to the list
             conflicts.append((value, num_conflicts))
@@ -314,6 +357,7 @@ class CrosswordCreator():
 
         If no assignment is possible, return None.
         """
+        self.stats.count("nodes")
 
         if self.assignment_complete(assignment):
             return assignment
@@ -328,19 +372,270 @@ class CrosswordCreator():
                 if result != None:
                     return result
 
+        self.stats.count("failures")
         return None
 
+    def backjump(self, assignment):
+        """
+        Using Conflict-Directed Backjumping, take as input a partial
+        assignment for the crossword and return a complete assignment if
+        possible to do so.
+
+        Each variable keeps a conflict set of the earlier variables that
+        ruled out its values. When a variable runs out of values, search
+        jumps straight back to the most recently assigned variable in its
+        conflict set, and the words assigned to that conflict set are
+        learned as a nogood, so later branches containing the same
+        combination are cut immediately.
+
+        If no assignment is possible, return None.
+        """
+        result, _ = self.backjump_search(dict(assignment), list(assignment))
+        return result
+
+    def backjump_search(self, assignment, order):
+        """
+        Extend `assignment` (assigned in the sequence given by `order`).
+        Return a tuple `(result, conflicts)`: `result` is a complete
+        assignment or None, and on failure `conflicts` is the set of
+        assigned variables responsible for it.
+        """
+        self.stats.count("nodes")
+
+        if self.assignment_complete(assignment):
+            return assignment.copy(), set()
+
+        var = self.select_unassigned_variable(assignment)
+        conflicts = set()
+        for value in self.order_domain_values(var, assignment):
+
+            # Skip values ruled out by an earlier variable or a nogood
+            blocked, culprits = self.value_conflicts(
+                var, value, assignment, order
+            )
+            if blocked:
+                conflicts |= culprits
+                continue
+
+            assignment[var] = value
+            order.append(var)
+            result, child_conflicts = self.backjump_search(assignment, order)
+            order.pop()
+            del assignment[var]
+
+            if result is not None:
+                return result, set()
+
+            # var played no part in the failure below, so jump past it
+            if var not in child_conflicts:
+                self.stats.count("backjumps")
+                return None, child_conflicts
+            conflicts |= child_conflicts - {var}
+
+        # Every value of var failed: the conflict set's words are a nogood
+        self.stats.count("failures")
+        self.learn_nogood({(x, assignment[x]) for x in conflicts})
+        return None, conflicts
+
+    def value_conflicts(self, var, value, assignment, order):
+        """
+        Return a tuple `(blocked, culprits)`: whether `value` cannot be
+        assigned to `var`, and the set of assigned variables responsible.
+        The culprit is the earliest variable (in `order`) whose word
+        duplicates `value` or disagrees on an overlapping square, or else
+        the other variables of a learned nogood that `value` completes,
+        which is an empty set for a nogood of `(var, value)` alone.
+        Return `(False, set())` if `value` is consistent.
+        """
+        self.stats.count("consistency_checks")
+        for x in order:
+            word = assignment[x]
+            if word == value:
+                return True, {x}
+            overlap = self.crossword.overlaps[var, x]
+            if overlap is not None and value[overlap[0]] != word[overlap[1]]:
+                return True, {x}
+
+        for nogood in self.nogoods.get((var, value), ()):
+            if all(assignment.get(x) == word
+                   for x, word in nogood if x != var):
+                self.stats.count("nogood_hits")
+                return True, {x for x, _ in nogood if x != var}
+
+        return False, set()
+
+    def learn_nogood(self, pairs):
+        """
+        Record that the `(variable, word)` pairs in `pairs` cannot all be
+        part of one solution. Only nogoods of at most NOGOOD_SIZE pairs are
+        kept, since larger ones rarely recur. A nogood of a single pair
+        also removes its word from its variable's domain.
+        """
+        if len(pairs) > self.NOGOOD_SIZE:
+            return
+        self.stats.count("nogoods")
+        nogood = frozenset(pairs)
+
+        # A nogood of one pair rules the word out of the variable for good
+        if len(nogood) == 1:
+            (var, word), = nogood
+            if isinstance(self.domains[var], Bucket):
+                self.domains[var] = set(self.domains[var])
+            self.domains[var].discard(word)
+
+        for pair in nogood:
+            self.nogoods.setdefault(pair, set()).add(nogood)
+
+    def enumerate_solutions(self, limit=None):
+        """
+        Enforce node and arc consistency, and then lazily yield every
+        distinct complete assignment for the crossword, up to `limit`
+        solutions if `limit` is not None.
+        """
+        count = 0
+        for assignment, var, values in self.solution_families():
+            for value in values:
+                if limit is not None and count >= limit:
+                    return
+                solution = assignment.copy()
+                if var is not None:
+                    solution[var] = value
+                count += 1
+                yield solution
+
+    def count_solutions(self, limit=None):
+        """
+        Enforce node and arc consistency, and then return the number of
+        distinct complete assignments for the crossword, stopping at
+        `limit` if `limit` is not None.
+
+        Solutions are counted a family at a time, so no assignment is
+        ever built for the individual solutions being counted.
+        """
+        count = 0
+        for _, _, values in self.solution_families():
+            count += len(values)
+            if limit is not None and count >= limit:
+                return limit
+        return count
+
+    def solution_families(self):
+        """
+        Enforce node and arc consistency, and then yield the solutions of
+        the crossword grouped into families `(assignment, var, values)`:
+        each family is every extension of the partial `assignment` that
+        gives the last unassigned variable `var` one of `values`.
+
+        `assignment` is the search's working assignment, and is only
+        valid until the next family is requested. If the crossword has
+        no variables, the single empty solution is yielded with `var`
+        None.
+        """
+        self.enforce_node_consistency()
+        if not self.ac3():
+            return
+        if not self.domains:
+            yield dict(), None, [None]
+            return
+
+        # Search prunes domains in place, so shared buckets become sets
+        for var in self.domains:
+            if isinstance(self.domains[var], Bucket):
+                self.domains[var] = set(self.domains[var])
+
+        yield from self.forward_search(dict(), [])
+
+    def forward_search(self, assignment, trail):
+        """
+        Using Backtracking Search with forward checking, yield the
+        solution families extending `assignment`.
+
+        Assigning a word prunes the domains of the unassigned variables
+        in place, and every removal is recorded on `trail` so it can be
+        undone once the branch is exhausted. Sibling branches therefore
+        share one set of propagated domains instead of copying them.
+        """
+        self.stats.count("nodes")
+        var = self.select_unassigned_variable(assignment)
+
+        # With one variable left, every remaining value is a solution
+        if len(assignment) == len(self.domains) - 1:
+            yield assignment, var, sorted(self.domains[var])
+            return
+
+        for value in sorted(self.domains[var]):
+            mark = len(trail)
+
+            # Undo pruning even if the caller stops consuming early
+            try:
+                if self.forward_check(var, value, assignment, trail):
+                    assignment[var] = value
+                    yield from self.forward_search(assignment, trail)
+                    del assignment[var]
+            finally:
+                self.undo(trail, mark)
+
+    def forward_check(self, var, value, assignment, trail):
+        """
+        Remove from the domain of every unassigned variable the words
+        that conflict with assigning `value` to `var`: the same word, or
+        a word that disagrees on an overlapping square. Record each
+        removal on `trail`.
+
+        Return False if some domain ends up empty, True otherwise.
+        """
+        self.stats.count("consistency_checks")
+        for other in self.domains:
+            if other == var or other in assignment:
+                continue
+
+            removeables = set()
+            if value in self.domains[other]:
+                removeables.add(value)
+
+            overlap = self.crossword.overlaps[var, other]
+            if overlap is not None:
+                i, j = overlap
+                for word in self.domains[other]:
+                    if word[j] != value[i]:
+                        removeables.add(word)
+
+            for word in removeables:
+                self.domains[other].remove(word)
+                trail.append((other, word))
+
+            if len(self.domains[other]) == 0:
+                self.stats.count("failures")
+                return False
+
+        return True
+
+    def undo(self, trail, mark):
+        """
+        Restore every domain removal recorded on `trail` after `mark`.
+        """
+        while len(trail) > mark:
+            var, word = trail.pop()
+            self.domains[var].add(word)
+
 
 def main():
 
+    # Split off the optional statistics dump
+    args = sys.argv[1:]
+    stats = None
+    if len(args) >= 2 and args[-2] == "--stats":
+        stats = args[-1]
+        args = args[:-2]
+
     # Check usage
-    if len(sys.argv) not in [3, 4]:
-        sys.exit("Usage: python generate.py structure words [output]")
+    if len(args) not in [2, 3]:
+        sys.exit("Usage: python generate.py structure words [output] [--stats stats.json]")
 
     # Parse command-line arguments
-    structure = sys.argv[1]
-    words = sys.argv[2]
-    output = sys.argv[3] if len(sys.argv) == 4 else None
+    structure = args[0]
+    words = args[1]
+    output = args[2] if len(args) == 3 else None
 
     # Generate crossword
     crossword = Crossword(structure, words)
@@ -355,6 +650,10 @@ def main():
         if output:
             creator.save(assignment, output)
 
+    # Save solver statistics
+    if stats:
+        creator.stats.dump(stats)
+
 
 if __name__ == "__main__":
     main()
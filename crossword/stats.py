@@ -0,0 +1,69 @@
+import functools
+import json
+import time
+from contextlib import contextmanager
+
+
+class SolverStats():
+    """
+    Counters and cumulative timers describing where a solver spends
+    its work and time.
+    """
+
+    def __init__(self):
+        self.counters = dict()
+        self.timers = dict()
+
+    def count(self, name, n=1):
+        """Add `n` to the counter `name`."""
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    @contextmanager
+    def timer(self, name):
+        """
+        Context manager that adds the time spent inside it to the timer
+        `name`, and counts one call of `name`.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.timers[name] = self.timers.get(name, 0) + elapsed
+            self.count(f"{name}_calls")
+
+    def reset(self):
+        """Clear all counters and timers."""
+        self.counters.clear()
+        self.timers.clear()
+
+    def as_dict(self):
+        """Return the counters and timers (in seconds) as a dictionary."""
+        return {
+            "counters": dict(sorted(self.counters.items())),
+            "timers": dict(sorted(self.timers.items()))
+        }
+
+    def dump(self, filename):
+        """Write the counters and timers to `filename` as JSON."""
+        with open(filename, "w") as f:
+            json.dump(self.as_dict(), f, indent=4)
+
+    def __str__(self):
+        lines = [f"{name}: {value}" for name, value in sorted(self.counters.items())]
+        lines += [f"{name}: {value:.6f}s" for name, value in sorted(self.timers.items())]
+        return "\n".join(lines)
+
+
+def timed(name):
+    """
+    Decorator for methods of objects with a `stats` attribute, timing
+    every call of the method under `name`.
+    """
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            with self.stats.timer(name):
+                return method(self, *args, **kwargs)
+        return wrapper
+    return decorator
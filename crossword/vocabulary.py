@@ -0,0 +1,205 @@
+import mmap
+import struct
+import sys
+from collections.abc import Set
+
+# Compiled vocabulary layout (all integers little-endian):
+#    header:  magic, number of buckets
+#    buckets: word length, record width in bytes, word count, data offset
+#    data:    each bucket's words, sorted, as fixed-width NUL-padded records
+MAGIC = b"XWVOCAB1"
+HEADER = struct.Struct("<8sI")
+BUCKET = struct.Struct("<IIIQ")
+
+
+class Bucket(Set):
+    """
+    Read-only, sorted set of all vocabulary words of one length.
+    Words are decoded on demand from a shared buffer, so a bucket can be
+    handed out as a domain to any number of variables without copying.
+    """
+
+    def __init__(self, buffer, length, width, count, offset, base):
+        self.buffer = buffer
+        self.length = length
+        self.width = width
+        self.count = count
+        self.offset = offset
+        self.base = base
+
+    @classmethod
+    def _from_iterable(cls, iterable):
+        # Set operations (e.g. `bucket - removeables`) produce plain sets
+        return set(iterable)
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        for index in range(self.count):
+            yield self.word(index)
+
+    def __contains__(self, word):
+        return self.index(word) is not None
+
+    def __repr__(self):
+        return f"Bucket(length={self.length}, count={self.count})"
+
+    def record(self, index):
+        """Return the raw, padded record stored at position `index`."""
+        start = self.offset + index * self.width
+        return bytes(self.buffer[start:start + self.width])
+
+    def word(self, index):
+        """Return the word stored at position `index` of the bucket."""
+        return self.record(index).rstrip(b"\0").decode("utf-8")
+
+    def index(self, word):
+        """
+        Return the position of `word` in the bucket, or None if absent.
+        Uses binary search over the sorted records.
+        """
+        if not isinstance(word, str) or len(word) != self.length:
+            return None
+        key = word.encode("utf-8")
+        if len(key) > self.width:
+            return None
+        key = key.ljust(self.width, b"\0")
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            if self.record(middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+        if low < self.count and self.record(low) == key:
+            return low
+        return None
+
+
+class Vocabulary():
+    """
+    Crossword word list, bucketed by word length.
+
+    Every word has a stable integer id: buckets are laid out in order of
+    increasing length and words within a bucket in sorted order, so the
+    same word list always produces the same ids.
+    """
+
+    def __init__(self, buffer, source=None):
+        self.buffer = buffer
+        self.source = source
+        self.buckets = dict()
+
+        magic, count = HEADER.unpack_from(buffer, 0)
+        if magic != MAGIC:
+            raise ValueError("not a compiled vocabulary")
+        base = 0
+        for k in range(count):
+            length, width, size, offset = BUCKET.unpack_from(
+                buffer, HEADER.size + k * BUCKET.size
+            )
+            self.buckets[length] = Bucket(
+                buffer, length, width, size, offset, base
+            )
+            base += size
+        self.size = base
+
+    @classmethod
+    def load(cls, filename):
+        """
+        Load a vocabulary from `filename`.
+        Compiled vocabularies are memory-mapped from disk; plain word
+        lists (one word per line) are compiled in memory.
+        """
+        with open(filename, "rb") as f:
+            if f.read(len(MAGIC)) == MAGIC:
+                f.seek(0)
+                buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                return cls(buffer, source=filename)
+        with open(filename) as f:
+            return cls(compile_words(f.read().splitlines()), source=filename)
+
+    def __len__(self):
+        return self.size
+
+    def __iter__(self):
+        for length in sorted(self.buckets):
+            yield from self.buckets[length]
+
+    def __contains__(self, word):
+        return self.word_id(word) is not None
+
+    def bucket(self, length):
+        """
+        Return the bucket of all words with `length` characters.
+        If there are no such words, return an empty bucket.
+        """
+        if length not in self.buckets:
+            self.buckets[length] = Bucket(b"", length, 0, 0, 0, self.size)
+        return self.buckets[length]
+
+    def word_id(self, word):
+        """Return the stable id of `word`, or None if not in vocabulary."""
+        bucket = self.buckets.get(len(word))
+        if bucket is None:
+            return None
+        index = bucket.index(word)
+        if index is None:
+            return None
+        return bucket.base + index
+
+    def word(self, word_id):
+        """Return the word with stable id `word_id`."""
+        for bucket in self.buckets.values():
+            if bucket.base <= word_id < bucket.base + bucket.count:
+                return bucket.word(word_id - bucket.base)
+        raise IndexError("word id out of range")
+
+
+def compile_words(words):
+    """
+    Return the compiled vocabulary representation of `words` as bytes.
+    Words are uppercased and deduplicated; blank lines are ignored.
+    """
+    buckets = dict()
+    for word in words:
+        word = word.strip().upper()
+        if word:
+            buckets.setdefault(len(word), set()).add(word.encode("utf-8"))
+
+    lengths = sorted(buckets)
+    offset = HEADER.size + len(lengths) * BUCKET.size
+    header = [HEADER.pack(MAGIC, len(lengths))]
+    data = []
+    for length in lengths:
+        records = sorted(buckets[length])
+        width = max(len(record) for record in records)
+        header.append(BUCKET.pack(length, width, len(records), offset))
+        data.extend(record.ljust(width, b"\0") for record in records)
+        offset += width * len(records)
+
+    return b"".join(header + data)
+
+
+def compile_file(words_file, output_file):
+    """
+    Compile the plain word list `words_file` into `output_file`.
+    """
+    with open(words_file) as f:
+        compiled = compile_words(f.read().splitlines())
+    with open(output_file, "wb") as f:
+        f.write(compiled)
+
+
+def main():
+
+    # Check usage
+    if len(sys.argv) != 3:
+        sys.exit("Usage: python vocabulary.py words compiled")
+
+    compile_file(sys.argv[1], sys.argv[2])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+import csv
+import json
+import multiprocessing
+import os
+import sys
+import time
+
+from heredity import PROBS, MODES, infer, load_data
+from sampling import METHODS, sample
+
+# Output formats for batch results
+FORMATS = ["jsonl", "csv"]
+
+
+def load_sources(path):
+    """
+    Load people from `path`, either a CSV file or a directory of CSV
+    files. Return a list of `(source, people)` pairs, one per file, where
+    `source` is the file's name without its extension.
+    """
+    if os.path.isdir(path):
+        filenames = sorted(
+            os.path.join(path, filename) for filename in os.listdir(path)
+            if filename.endswith(".csv")
+        )
+    else:
+        filenames = [path]
+    return [
+        (os.path.splitext(os.path.basename(filename))[0], load_data(filename))
+        for filename in filenames
+    ]
+
+
+def split_families(people):
+    """
+    Split `people` into connected pedigrees, people being connected to
+    their parents. Return a list of people dictionaries, in order of
+    each family's first member in `people`.
+    """
+
+    # Union-find over parent links
+    root = {person: person for person in people}
+
+    def find(person):
+        while root[person] != person:
+            root[person] = root[root[person]]
+            person = root[person]
+        return person
+
+    for person in people:
+        for parent in (people[person]["mother"], people[person]["father"]):
+            if parent is not None:
+                root[find(parent)] = find(person)
+
+    families = dict()
+    for person in people:
+        families.setdefault(find(person), dict())[person] = people[person]
+    return list(families.values())
+
+
+def families(path):
+    """
+    Yield `(family, people)` for every connected pedigree in `path`,
+    where `family` is "source:k" for the k-th family in file `source`.
+    """
+    for source, people in load_sources(path):
+        for k, family in enumerate(split_families(people)):
+            yield f"{source}:{k}", family
+
+
+def infer_family(family, people, mode):
+    """
+    Compute probabilities for one family with inference `mode`.
+    Return a dictionary of: family, number of people, seconds taken,
+    and probabilities.
+    """
+    start = time.perf_counter()
+    if mode in METHODS:
+
+        # Workers cannot start pools of their own, so chains run inline
+        probabilities = sample(people, PROBS, method=mode, processes=0)
+    else:
+        probabilities = infer(people, mode)
+    return {
+        "family": family,
+        "people": len(people),
+        "seconds": time.perf_counter() - start,
+        "probabilities": probabilities
+    }
+
+
+def infer_task(task):
+    """Unpack a `(family, people, mode)` task for `infer_family`."""
+    return infer_family(*task)
+
+
+def run(path, mode="elimination", processes=None):
+    """
+    Run inference with `mode` for every family in `path` in a pool of
+    worker processes, yielding each family's result as it completes.
+    """
+    tasks = ((family, people, mode) for family, people in families(path))
+    with multiprocessing.Pool(processes) as pool:
+        yield from pool.imap_unordered(infer_task, tasks)
+
+
+def write_jsonl(results, file):
+    """Write one JSON object per family result to `file`."""
+    for result in results:
+        file.write(json.dumps(result) + "\n")
+        file.flush()
+
+
+def write_csv(results, file):
+    """Write one CSV row per person in each family result to `file`."""
+    writer = csv.writer(file)
+    writer.writerow([
+        "family", "name", "gene_2", "gene_1", "gene_0",
+        "trait_true", "trait_false", "seconds"
+    ])
+    for result in results:
+        for person, probabilities in result["probabilities"].items():
+            writer.writerow([
+                result["family"], person,
+                *(probabilities["gene"][genes] for genes in (2, 1, 0)),
+                probabilities["trait"][True], probabilities["trait"][False],
+                result["seconds"]
+            ])
+        file.flush()
+
+
+def main():
+
+    # Check for proper usage
+    if len(sys.argv) not in [2, 3, 4]:
+        sys.exit("Usage: python batch.py data [mode] [jsonl|csv]")
+    path = sys.argv[1]
+    mode = sys.argv[2] if len(sys.argv) >= 3 else "elimination"
+    output = sys.argv[3] if len(sys.argv) == 4 else "jsonl"
+    if mode not in MODES:
+        sys.exit(f"Unknown inference mode: {mode}")
+    if output not in FORMATS:
+        sys.exit(f"Unknown output format: {output}")
+
+    # Stream results as families finish
+    results = run(path, mode)
+    if output == "jsonl":
+        write_jsonl(results, sys.stdout)
+    else:
+        write_csv(results, sys.stdout)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+import numpy as np
+
+from elimination import GENES, inheritance, probabilities_from_genes
+
+# Number of gene assignments evaluated together in one array operation
+CHUNK_SIZE = 1 << 16
+
+
+def tables(probs):
+    """
+    Return the model's probability tables as arrays: the gene prior
+    indexed by gene count, the inheritance table indexed by
+    `[genes, mother, father]`, and the trait table indexed by
+    `[genes, trait]`.
+    """
+    prior = np.array([probs["gene"][g] for g in GENES])
+    table = inheritance(probs)
+    inherit = np.zeros((3, 3, 3))
+    for (genes, mother, father), p in table.items():
+        inherit[genes, mother, father] = p
+    trait = np.array([
+        [probs["trait"][g][False], probs["trait"][g][True]] for g in GENES
+    ])
+    return prior, inherit, trait
+
+
+def batched_enumeration(people, probs, chunk_size=CHUNK_SIZE):
+    """
+    Compute gene and trait probabilities for everyone in `people` by
+    enumerating every combination of gene counts, `chunk_size` at a
+    time, and return them in the same structure as heredity.main.
+
+    Each combination is one row of an integer array, whose joint
+    probability is computed for the whole chunk at once from the
+    precomputed tables. Unknown traits are summed out exactly rather
+    than enumerated: a person's trait depends only on their own gene
+    count, so their trait distribution follows from their gene
+    distribution.
+    """
+    names = list(people)
+    index = {name: k for k, name in enumerate(names)}
+    n = len(names)
+    prior, inherit, trait = tables(probs)
+
+    # Person k's gene count is digit k of the combination in base 3
+    powers = 3 ** np.arange(n, dtype=np.int64)
+    offsets = 3 * np.arange(n)
+    totals = np.zeros(3 * n)
+
+    for start in range(0, 3 ** n, chunk_size):
+        combinations = np.arange(start, min(start + chunk_size, 3 ** n),
+                                 dtype=np.int64)
+        genes = (combinations[:, None] // powers) % 3
+
+        # Joint probability of each combination and the known traits
+        p = np.ones(len(combinations))
+        for name in names:
+            k = index[name]
+            mother = people[name]["mother"]
+            father = people[name]["father"]
+            if mother is None or father is None:
+                p *= prior[genes[:, k]]
+            else:
+                p *= inherit[genes[:, k],
+                             genes[:, index[mother]],
+                             genes[:, index[father]]]
+            if people[name]["trait"] is not None:
+                p *= trait[genes[:, k], int(people[name]["trait"])]
+
+        # Add each combination's probability to every person's gene count
+        totals += np.bincount(
+            (genes + offsets).ravel(),
+            weights=np.repeat(p, n),
+            minlength=3 * n
+        )
+
+    totals = totals.reshape(n, 3)
+    totals /= totals.sum(axis=1, keepdims=True)
+    distributions = {
+        name: {g: float(totals[index[name], g]) for g in GENES}
+        for name in names
+    }
+    return probabilities_from_genes(people, distributions, probs)
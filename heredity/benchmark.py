@@ -0,0 +1,116 @@
+import random
+import sys
+import time
+
+from heredity import PROBS, MODES, infer
+from pedigree import generate_pedigree
+from sampling import METHODS, sample
+
+# Pedigree sizes to benchmark, and how each pedigree is generated
+SIZES = [3, 5, 7, 10, 12, 25, 50, 100, 200, 500]
+FOUNDERS = 4
+EVIDENCE = 0.3
+SEED = 0
+
+# Largest pedigree each mode is run on (None for no limit)
+MAX_SIZE = {
+    "enumeration": 7,
+    "elimination": None,
+    "batched": 12,
+    "likelihood": 50,
+    "gibbs": 100
+}
+
+# Seconds each sampling run may take
+TIME_BUDGET = 5.0
+
+# Largest difference from the exact answer that still counts as agreeing
+TOLERANCE = {
+    "enumeration": 1e-9,
+    "elimination": 1e-9,
+    "batched": 1e-9,
+    "likelihood": 0.05,
+    "gibbs": 0.05
+}
+
+
+def to_people(rows):
+    """Return pedigree `rows` in the structure returned by load_data."""
+    return {
+        name: {
+            "name": name,
+            "mother": mother or None,
+            "father": father or None,
+            "trait": True if trait == "1" else False if trait == "0" else None
+        }
+        for name, mother, father, trait in rows
+    }
+
+
+def difference(a, b):
+    """Return the largest difference between two `probabilities`."""
+    return max(
+        abs(a[person][field][value] - b[person][field][value])
+        for person in a
+        for field in a[person]
+        for value in a[person][field]
+    )
+
+
+def run_mode(people, mode):
+    """
+    Run inference `mode` on `people`. Return the probabilities and the
+    number of seconds taken.
+    """
+    start = time.perf_counter()
+    if mode in METHODS:
+        probabilities = sample(people, PROBS, method=mode, time_budget=TIME_BUDGET)
+    else:
+        probabilities = infer(people, mode)
+    return probabilities, time.perf_counter() - start
+
+
+def run(sizes=SIZES, modes=MODES, seed=SEED):
+    """
+    Time every inference mode in `modes` on a generated pedigree of each
+    size in `sizes`, checking each answer against exact variable
+    elimination. Print one line per run and return the list of runs.
+    """
+    rng = random.Random(seed)
+    runs = []
+    for size in sizes:
+        people = to_people(generate_pedigree(size, FOUNDERS, EVIDENCE, rng))
+        exact, _ = run_mode(people, "elimination")
+
+        for mode in modes:
+            if MAX_SIZE[mode] is not None and size > MAX_SIZE[mode]:
+                continue
+            probabilities, seconds = run_mode(people, mode)
+            error = difference(exact, probabilities)
+            agrees = error <= TOLERANCE[mode]
+            runs.append({
+                "size": size,
+                "mode": mode,
+                "seconds": seconds,
+                "error": error,
+                "agrees": agrees
+            })
+            print(f"{size:6} {mode:12} {seconds:10.4f}s "
+                  f"error={error:.2e} {'ok' if agrees else 'MISMATCH'}")
+    return runs
+
+
+def main():
+
+    # Check for proper usage
+    if len(sys.argv) not in [1, 2]:
+        sys.exit("Usage: python benchmark.py [seed]")
+    seed = int(sys.argv[1]) if len(sys.argv) == 2 else SEED
+
+    runs = run(seed=seed)
+    if not all(run["agrees"] for run in runs):
+        sys.exit("Inference modes disagree.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,361 @@
+import heapq
+import itertools
+import operator
+
+# Number of copies of the gene a person can have
+GENES = (0, 1, 2)
+
+
+class Factor():
+    """
+    Non-negative function over the gene counts of a set of people.
+    `variables` is a tuple of names, and `values` maps every tuple of
+    gene counts (one per variable, in order) to a number.
+    """
+
+    def __init__(self, variables, values):
+        self.variables = tuple(variables)
+        self.values = values
+
+    def __repr__(self):
+        return f"Factor({self.variables})"
+
+    @classmethod
+    def unit(cls):
+        """Return the factor over no variables with value 1."""
+        return cls((), {(): 1})
+
+    def multiply(self, other):
+        """Return the product of this factor and `other`."""
+        variables = self.variables + tuple(
+            v for v in other.variables if v not in self.variables
+        )
+        positions = {v: k for k, v in enumerate(variables)}
+        mine = projection([positions[v] for v in self.variables])
+        theirs = projection([positions[v] for v in other.variables])
+
+        values = dict()
+        for genes in itertools.product(GENES, repeat=len(variables)):
+            values[genes] = self.values[mine(genes)] * other.values[theirs(genes)]
+        return Factor(variables, values)
+
+    def marginalize(self, keep):
+        """
+        Return the factor over the variables in `keep`, summing out all
+        other variables.
+        """
+        variables = tuple(v for v in self.variables if v in keep)
+        project = projection([self.variables.index(v) for v in variables])
+
+        values = {genes: 0 for genes in itertools.product(GENES, repeat=len(variables))}
+        for genes, value in self.values.items():
+            values[project(genes)] += value
+        return Factor(variables, values)
+
+    def normalized(self):
+        """
+        Return this factor scaled so its values sum to 1. Scaling keeps
+        long products of small probabilities from underflowing.
+        """
+        total = sum(self.values.values())
+        if total == 0:
+            return self
+        return Factor(self.variables, {
+            genes: value / total for genes, value in self.values.items()
+        })
+
+
+def projection(positions):
+    """
+    Return a function mapping a tuple to the tuple of its items at
+    `positions`.
+    """
+    if len(positions) == 0:
+        return lambda genes: ()
+    elif len(positions) == 1:
+        k = positions[0]
+        return lambda genes: (genes[k],)
+    return operator.itemgetter(*positions)
+
+
+def inheritance(probs):
+    """
+    Return a table mapping `(genes, mother, father)` gene counts to the
+    probability that a child of such parents has `genes` copies.
+    """
+    # Probability of passing the gene on, given the parent's gene count
+    passes = {
+        0: probs["mutation"],
+        1: 0.5,
+        2: 1 - probs["mutation"]
+    }
+    table = dict()
+    for mother, father in itertools.product(GENES, repeat=2):
+        m, f = passes[mother], passes[father]
+        table[0, mother, father] = (1 - m) * (1 - f)
+        table[1, mother, father] = m * (1 - f) + f * (1 - m)
+        table[2, mother, father] = m * f
+    return table
+
+
+def pedigree_factors(people, probs):
+    """
+    Compile `people` into a list of factors over gene counts, whose
+    product is proportional to the distribution of gene counts given
+    the known traits.
+
+    Each person contributes one factor: the gene prior for people with
+    no parents, or the inheritance table for everyone else, multiplied
+    by the probability of their trait if it is known. Unknown traits
+    sum to 1 and are left out.
+    """
+    table = inheritance(probs)
+    return [person_factor(people, person, probs, table) for person in people]
+
+
+def person_factor(people, person, probs, table=None):
+    """
+    Return the factor `person` contributes to their pedigree. `table` is
+    the inheritance table, computed from `probs` if not given.
+    """
+    mother = people[person]["mother"]
+    father = people[person]["father"]
+    trait = people[person]["trait"]
+
+    def emission(genes):
+        return 1 if trait is None else probs["trait"][genes][trait]
+
+    if mother is None or father is None:
+        return Factor((person,), {
+            (genes,): probs["gene"][genes] * emission(genes)
+            for genes in GENES
+        })
+
+    if table is None:
+        table = inheritance(probs)
+    return Factor((person, mother, father), {
+        key: value * emission(key[0])
+        for key, value in table.items()
+    })
+
+
+def elimination_order(variables, factors):
+    """
+    Return an order in which to eliminate `variables`, and a dictionary
+    mapping each variable to the set of its neighbors in the interaction
+    graph of `factors` at the time it is eliminated.
+
+    Variables are picked greedily by fewest fill-in edges added, ties
+    broken by fewest neighbors. Only the neighbors of an eliminated
+    variable have their scores refreshed, which keeps ordering fast on
+    large pedigrees.
+    """
+    neighbors = {v: set() for v in variables}
+    for factor in factors:
+        for v in factor.variables:
+            neighbors[v].update(u for u in factor.variables if u != v)
+
+    def score(v):
+        fill = sum(
+            1 for a, b in itertools.combinations(neighbors[v], 2)
+            if b not in neighbors[a]
+        )
+        return (fill, len(neighbors[v]), v)
+
+    scores = {v: score(v) for v in variables}
+    heap = list(scores.values())
+    heapq.heapify(heap)
+
+    order = []
+    eliminated = dict()
+    while heap:
+        _, _, v = entry = heapq.heappop(heap)
+        if v in eliminated or scores[v] != entry:
+            continue
+
+        # Connect v's neighbors to each other, then remove v
+        adjacent = neighbors.pop(v)
+        for a, b in itertools.combinations(adjacent, 2):
+            neighbors[a].add(b)
+            neighbors[b].add(a)
+        for u in adjacent:
+            neighbors[u].discard(v)
+        order.append(v)
+        eliminated[v] = adjacent
+
+        for u in adjacent:
+            scores[u] = score(u)
+            heapq.heappush(heap, scores[u])
+
+    return order, eliminated
+
+
+class EliminationTree():
+    """
+    Clique tree built by eliminating the gene variables of a pedigree in
+    a good order. Each variable gets a clique (itself plus its neighbors
+    when it was eliminated), linked to the clique of the next of those
+    neighbors to be eliminated. Passing messages up and then down the
+    tree gives every person's gene marginal at roughly the cost of a
+    single variable elimination.
+
+    Upward messages are kept up to date as factors change; downward
+    messages are only computed when a marginal needs them.
+    """
+
+    def __init__(self, factors):
+        variables = set()
+        for factor in factors:
+            variables.update(factor.variables)
+        self.order, eliminated = elimination_order(variables, factors)
+        position = {v: k for k, v in enumerate(self.order)}
+
+        # Link each clique to the clique of its next eliminated neighbor
+        self.cliques = dict()
+        self.parent = dict()
+        self.children = {v: [] for v in variables}
+        for v in self.order:
+            self.cliques[v] = (v,) + tuple(
+                sorted(eliminated[v], key=position.get)
+            )
+            self.parent[v] = self.cliques[v][1] if eliminated[v] else None
+            if self.parent[v] is not None:
+                self.children[self.parent[v]].append(v)
+
+        # Each clique belongs to the tree of the last variable above it
+        self.root = dict()
+        for v in reversed(self.order):
+            u = self.parent[v]
+            self.root[v] = v if u is None else self.root[u]
+
+        # Each factor belongs to the clique of its first eliminated variable
+        self.factors = list(factors)
+        self.home = [
+            min(factor.variables, key=position.get) for factor in factors
+        ]
+        self.assigned = {v: [] for v in variables}
+        for k, v in enumerate(self.home):
+            self.assigned[v].append(k)
+        self.potentials = {v: self.potential(v) for v in variables}
+
+        self.up = dict()
+        self.down = dict()
+
+    def potential(self, v):
+        """Return the product of the factors assigned to clique `v`."""
+        potential = Factor.unit()
+        for k in self.assigned[v]:
+            potential = potential.multiply(self.factors[k])
+        return potential
+
+    def replace_factor(self, k, factor):
+        """
+        Replace factor number `k` with `factor`, which must be over the
+        same variables. Only the upward messages on the path from the
+        factor's clique to its root are recomputed. Downward messages in
+        that tree are discarded, apart from those into cliques on the
+        path, which summarize the unchanged side of the tree.
+        """
+        v = self.home[k]
+        self.factors[k] = factor
+        self.potentials[v] = self.potential(v)
+
+        path = []
+        while v is not None:
+            path.append(v)
+            v = self.parent[v]
+        for v in path:
+            if self.parent[v] is not None:
+                self.upward(v)
+
+        unchanged = set(path)
+        root = path[-1]
+        for v in list(self.down):
+            if self.root[v] == root and v not in unchanged:
+                del self.down[v]
+
+    def upward(self, v):
+        """Compute the message from clique `v` to its parent."""
+        belief = self.potentials[v]
+        for child in self.children[v]:
+            belief = belief.multiply(self.up[child])
+        self.up[v] = belief.marginalize(self.cliques[v][1:]).normalized()
+
+    def downward(self, v):
+        """Compute the message from the parent of clique `v` to `v`."""
+        u = self.parent[v]
+        belief = self.potentials[u]
+        if self.parent[u] is not None:
+            belief = belief.multiply(self.down[u])
+        for child in self.children[u]:
+            if child != v:
+                belief = belief.multiply(self.up[child])
+        self.down[v] = belief.marginalize(self.cliques[v][1:]).normalized()
+
+    def calibrate(self):
+        """
+        Pass messages up the tree, from the first eliminated clique to
+        the roots, and then back down it.
+        """
+        for v in self.order:
+            if self.parent[v] is not None:
+                self.upward(v)
+        for v in reversed(self.order):
+            if self.parent[v] is not None:
+                self.downward(v)
+
+    def ensure_down(self, v):
+        """
+        Compute any missing downward messages on the path from the root
+        of `v`'s tree down to `v`.
+        """
+        path = []
+        while self.parent[v] is not None and v not in self.down:
+            path.append(v)
+            v = self.parent[v]
+        for v in reversed(path):
+            self.downward(v)
+
+    def marginal(self, v):
+        """Return the normalized gene distribution of person `v`."""
+        self.ensure_down(v)
+        belief = self.potentials[v]
+        if self.parent[v] is not None:
+            belief = belief.multiply(self.down[v])
+        for child in self.children[v]:
+            belief = belief.multiply(self.up[child])
+        belief = belief.marginalize((v,)).normalized()
+        return {genes: belief.values[(genes,)] for genes in GENES}
+
+
+def probabilities_from_genes(people, genes, probs):
+    """
+    Return the `probabilities` structure printed by heredity.main, given
+    the gene distribution `genes[person]` of every person.
+    """
+    probabilities = dict()
+    for person in people:
+        trait = people[person]["trait"]
+        if trait is None:
+            has_trait = sum(
+                genes[person][g] * probs["trait"][g][True] for g in GENES
+            )
+        else:
+            has_trait = 1.0 if trait else 0.0
+        probabilities[person] = {
+            "gene": {g: genes[person][g] for g in (2, 1, 0)},
+            "trait": {True: has_trait, False: 1 - has_trait}
+        }
+    return probabilities
+
+
+def variable_elimination(people, probs):
+    """
+    Compute the normalized gene and trait distributions of everyone in
+    `people` exactly, by variable elimination over the pedigree's
+    factors, and return them in the same structure as heredity.main.
+    """
+    tree = EliminationTree(pedigree_factors(people, probs))
+    tree.calibrate()
+    genes = {person: tree.marginal(person) for person in people}
+    return probabilities_from_genes(people, genes, probs)
@@ -2,6 +2,9 @@ import csv
 import itertools
 import sys
 
+from elimination import variable_elimination
+from sampling import sample
+
 PROBS = {
 
     # Unconditional probabilities for having gene
@@ -36,13 +39,55 @@ PROBS = {
     "mutation": 0.01
 }
 
+# Inference methods available to `infer`
+MODES = ["enumeration", "elimination", "batched", "likelihood", "gibbs"]
+
 
 def main():
 
     # Check for proper usage
-    if len(sys.argv) != 2:
-        sys.exit("Usage: python heredity.py data.csv")
+    if len(sys.argv) not in [2, 3]:
+        sys.exit(f"Usage: python heredity.py data.csv [{'|'.join(MODES)}]")
     people = load_data(sys.argv[1])
+    mode = sys.argv[2] if len(sys.argv) == 3 else "enumeration"
+    if mode not in MODES:
+        sys.exit(f"Unknown inference mode: {mode}")
+
+    # Compute gene and trait probabilities for each person
+    probabilities = infer(people, mode)
+
+    # Print results
+    for person in people:
+        print(f"{person}:")
+        for field in probabilities[person]:
+            print(f"  {field.capitalize()}:")
+            for value in probabilities[person][field]:
+                p = probabilities[person][field][value]
+                print(f"    {value}: {p:.4f}")
+
+
+def infer(people, mode="enumeration"):
+    """
+    Return the normalized gene and trait probability distributions of
+    everyone in `people`, computed with the inference method `mode`.
+    """
+    if mode == "enumeration":
+        return enumeration(people)
+    elif mode == "elimination":
+        return variable_elimination(people, PROBS)
+    elif mode == "batched":
+        from batched import batched_enumeration
+        return batched_enumeration(people, PROBS)
+    elif mode in ("likelihood", "gibbs"):
+        return sample(people, PROBS, method=mode)
+    raise ValueError(f"unknown inference mode {mode!r}")
+
+
+def enumeration(people):
+    """
+    Compute gene and trait probabilities for everyone in `people` by
+    enumerating every combination of gene counts and traits.
+    """
 
     # Keep track of gene and trait probabilities for each person
     probabilities = {
@@ -83,15 +128,7 @@ def main():
 
     # Ensure probabilities sum to 1
     normalize(probabilities)
-
-    # Print results
-    for person in people:
-        print(f"{person}:")
-        for field in probabilities[person]:
-            print(f"  {field.capitalize()}:")
-            for value in probabilities[person][field]:
-                p = probabilities[person][field][value]
-                print(f"    {value}: {p:.4f}")
+    return probabilities
 
 
 def load_data(filename):
@@ -0,0 +1,104 @@
+import random
+import sys
+
+from elimination import GENES, inheritance
+from heredity import PROBS
+
+# Range of the number of children each couple has
+CHILDREN = (1, 4)
+
+
+def generate_pedigree(size, founders, evidence, rng, marry_in=0.8, probs=PROBS):
+    """
+    Return a list of `(name, mother, father, trait)` rows describing a
+    random multi-generation pedigree of `size` people.
+
+    The first generation has `founders` unrelated people. Each later
+    generation is made of the children of the couples in the one before.
+    A fraction `marry_in` of those children pair up with a new, unrelated
+    spouse; the rest pair with someone of their own generation from a
+    different family, which closes loops in the pedigree.
+
+    Gene counts and traits are sampled from `probs`, and each person's
+    trait is recorded (as "1" or "0") with probability `evidence`, and
+    left blank otherwise.
+    """
+    table = inheritance(probs)
+    rows = []
+    genes = dict()
+
+    def add(mother=None, father=None):
+        name = f"P{len(rows)}"
+        if mother is None:
+            weights = [probs["gene"][g] for g in GENES]
+        else:
+            weights = [table[g, genes[mother], genes[father]] for g in GENES]
+        genes[name] = rng.choices(GENES, weights=weights)[0]
+        trait = ""
+        if rng.random() < evidence:
+            has_trait = rng.random() < probs["trait"][genes[name]][True]
+            trait = "1" if has_trait else "0"
+        rows.append((name, mother or "", father or "", trait))
+        return name
+
+    generation = [(add(), None) for _ in range(max(2, min(founders, size)))]
+    while len(rows) < size:
+
+        # Pair up the generation, avoiding siblings where possible
+        rng.shuffle(generation)
+        couples = []
+        single = []
+        for person, family in generation:
+            if len(rows) >= size:
+                break
+            if rng.random() < marry_in:
+                couples.append((person, add()))
+                continue
+            partner = next(
+                (k for k, (_, other) in enumerate(single)
+                 if family is None or other != family), None
+            )
+            if partner is None:
+                single.append((person, family))
+            else:
+                couples.append((single.pop(partner)[0], person))
+
+        # Every couple has children, who form the next generation
+        generation = []
+        for k, (mother, father) in enumerate(couples):
+            for _ in range(rng.randint(*CHILDREN)):
+                if len(rows) >= size:
+                    break
+                generation.append((add(mother, father), k))
+
+        # Keep a dwindling family line going with a new couple
+        if len(generation) == 0 and len(rows) < size:
+            generation = [(add(), None) for _ in range(min(2, size - len(rows)))]
+
+    return rows
+
+
+def write_pedigree(rows, filename):
+    """Write pedigree `rows` to `filename` in the format of load_data."""
+    with open(filename, "w") as f:
+        f.write("name,mother,father,trait\n")
+        for row in rows:
+            f.write(",".join(row) + "\n")
+
+
+def main():
+
+    # Check for proper usage
+    if len(sys.argv) not in [5, 6]:
+        sys.exit("Usage: python pedigree.py size founders evidence output.csv [seed]")
+    size = int(sys.argv[1])
+    founders = int(sys.argv[2])
+    evidence = float(sys.argv[3])
+    seed = int(sys.argv[5]) if len(sys.argv) == 6 else None
+
+    rows = generate_pedigree(size, founders, evidence, random.Random(seed))
+    write_pedigree(rows, sys.argv[4])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,354 @@
+import math
+import multiprocessing
+import random
+import time
+
+from elimination import GENES, inheritance
+
+# Sampling methods available to `sample`
+METHODS = ["likelihood", "gibbs"]
+
+# Model shared by the chains in one worker process (see `init_worker`)
+model = None
+
+
+class Model():
+    """
+    A family's people together with the probability tables, and the
+    orderings of people needed for sampling.
+    """
+
+    def __init__(self, people, probs):
+        self.people = people
+        self.probs = probs
+        self.table = inheritance(probs)
+
+        # Everyone's children, for the Gibbs conditionals
+        self.children = {person: [] for person in people}
+        for person in people:
+            for parent in self.parents(person) or ():
+                self.children[parent].append(person)
+
+        # Parents always come before their children
+        self.order = []
+        visited = set()
+
+        def visit(person):
+            if person in visited:
+                return
+            visited.add(person)
+            for parent in self.parents(person) or ():
+                visit(parent)
+            self.order.append(person)
+
+        for person in people:
+            visit(person)
+
+    def parents(self, person):
+        """Return `(mother, father)` for `person`, or None if unknown."""
+        mother = self.people[person]["mother"]
+        father = self.people[person]["father"]
+        if mother is None or father is None:
+            return None
+        return mother, father
+
+    def prior(self, person, genes, assignment):
+        """
+        Return the probability of `person` having `genes` copies, given
+        the gene counts of their parents in `assignment`.
+        """
+        parents = self.parents(person)
+        if parents is None:
+            return self.probs["gene"][genes]
+        mother, father = parents
+        return self.table[genes, assignment[mother], assignment[father]]
+
+    def emission(self, person, genes):
+        """
+        Return the probability of `person`'s known trait given `genes`,
+        or 1 if their trait is unknown.
+        """
+        trait = self.people[person]["trait"]
+        if trait is None:
+            return 1
+        return self.probs["trait"][genes][trait]
+
+
+def new_statistics(people):
+    """
+    Return empty sampling statistics for `people`. Weighted sums are
+    stored relative to `exp(scale)` so that tiny likelihood weights do
+    not underflow.
+    """
+    return {
+        "samples": 0,
+        "scale": 0.0,
+        "weight": 0.0,
+        "weight_squared": 0.0,
+        "genes": {person: [0.0, 0.0, 0.0] for person in people},
+        "trait": {person: 0.0 for person in people}
+    }
+
+
+def rescale(statistics, scale):
+    """Express the weighted sums in `statistics` relative to `scale`."""
+    factor = math.exp(statistics["scale"] - scale)
+    statistics["scale"] = scale
+    statistics["weight"] *= factor
+    statistics["weight_squared"] *= factor ** 2
+    for person in statistics["genes"]:
+        statistics["genes"][person] = [
+            value * factor for value in statistics["genes"][person]
+        ]
+        statistics["trait"][person] *= factor
+
+
+def record(statistics, model, assignment, log_weight):
+    """
+    Add the gene `assignment`, with likelihood weight `exp(log_weight)`,
+    to `statistics`. Unknown traits are recorded as the probability of
+    having the trait, rather than sampled.
+    """
+    if statistics["weight"] == 0 or log_weight > statistics["scale"]:
+        rescale(statistics, log_weight)
+    weight = math.exp(log_weight - statistics["scale"])
+
+    statistics["samples"] += 1
+    statistics["weight"] += weight
+    statistics["weight_squared"] += weight ** 2
+    for person, genes in assignment.items():
+        statistics["genes"][person][genes] += weight
+        statistics["trait"][person] += (
+            weight * model.probs["trait"][genes][True]
+        )
+
+
+def merge(statistics):
+    """Return the combination of a list of sampling `statistics`."""
+    merged = new_statistics(statistics[0]["genes"])
+    merged["scale"] = max(s["scale"] for s in statistics if s["weight"] > 0)
+    for s in statistics:
+        if s["weight"] == 0:
+            continue
+        s = {**s, "genes": dict(s["genes"]), "trait": dict(s["trait"])}
+        rescale(s, merged["scale"])
+        merged["samples"] += s["samples"]
+        merged["weight"] += s["weight"]
+        merged["weight_squared"] += s["weight_squared"]
+        for person in merged["genes"]:
+            for genes in GENES:
+                merged["genes"][person][genes] += s["genes"][person][genes]
+            merged["trait"][person] += s["trait"][person]
+    return merged
+
+
+def effective_sample_size(statistics):
+    """Return the effective sample size of weighted `statistics`."""
+    if statistics["weight_squared"] == 0:
+        return 0
+    return statistics["weight"] ** 2 / statistics["weight_squared"]
+
+
+def gelman_rubin(statistics):
+    """
+    Return the largest Gelman-Rubin statistic (potential scale
+    reduction) over every person's gene count indicators, given the
+    statistics of each of several unweighted chains.
+    """
+    chains = len(statistics)
+    n = min(s["samples"] for s in statistics)
+    if chains < 2 or n < 2:
+        return math.inf
+
+    worst = 1.0
+    for person in statistics[0]["genes"]:
+        for genes in GENES:
+            means = [s["genes"][person][genes] / s["weight"] for s in statistics]
+            within = sum(m * (1 - m) * n / (n - 1) for m in means) / chains
+            overall = sum(means) / chains
+            between = n * sum((m - overall) ** 2 for m in means) / (chains - 1)
+            if within == 0:
+                if between > 0:
+                    return math.inf
+                continue
+            pooled = (n - 1) / n * within + between / n
+            worst = max(worst, math.sqrt(pooled / within))
+    return worst
+
+
+def likelihood_weighting(model, rng, samples):
+    """
+    Draw `samples` gene assignments from the prior, parents before
+    children, each weighted by the likelihood of the known traits.
+    Return their statistics.
+    """
+    statistics = new_statistics(model.people)
+    for _ in range(samples):
+        assignment = dict()
+        log_weight = 0.0
+        for person in model.order:
+            weights = [model.prior(person, g, assignment) for g in GENES]
+            genes = rng.choices(GENES, weights=weights)[0]
+            assignment[person] = genes
+            log_weight += math.log(model.emission(person, genes))
+        record(statistics, model, assignment, log_weight)
+    return statistics
+
+
+def gibbs_conditional(model, person, assignment):
+    """
+    Return unnormalized weights for each gene count of `person`, given
+    everyone else's gene counts in `assignment`.
+    """
+    weights = []
+    for genes in GENES:
+        assignment[person] = genes
+        weight = model.prior(person, genes, assignment)
+        weight *= model.emission(person, genes)
+        for child in model.children[person]:
+            weight *= model.prior(child, assignment[child], assignment)
+        weights.append(weight)
+    return weights
+
+
+def gibbs(model, rng, sweeps, assignment, burn_in):
+    """
+    Run `sweeps` sweeps of Gibbs sampling from `assignment`, resampling
+    every person's gene count from its conditional in turn, and
+    recording the state after each sweep once `burn_in` sweeps have
+    passed. Return the statistics and the final assignment.
+    """
+    statistics = new_statistics(model.people)
+    if assignment is None:
+        assignment = dict()
+        for person in model.order:
+            weights = [model.prior(person, g, assignment) for g in GENES]
+            assignment[person] = rng.choices(GENES, weights=weights)[0]
+
+    for sweep in range(burn_in + sweeps):
+        for person in model.order:
+            weights = gibbs_conditional(model, person, assignment)
+            assignment[person] = rng.choices(GENES, weights=weights)[0]
+        if sweep >= burn_in:
+            record(statistics, model, assignment, 0.0)
+
+    return statistics, assignment
+
+
+def init_worker(people, probs):
+    """Build the model once in each worker process."""
+    global model
+    model = Model(people, probs)
+
+
+def run_batch(method, samples, burn_in, state):
+    """
+    Continue one chain for `samples` samples (or sweeps). `state` is the
+    chain's `(random state, assignment)` from its previous batch.
+    Return the batch's statistics and the chain's new state.
+    """
+    rng_state, assignment = state
+    rng = random.Random()
+    rng.setstate(rng_state)
+
+    if method == "likelihood":
+        statistics = likelihood_weighting(model, rng, samples)
+    else:
+        statistics, assignment = gibbs(
+            model, rng, samples, assignment, burn_in if assignment is None else 0
+        )
+    return statistics, (rng.getstate(), assignment)
+
+
+def sample(people, probs, method="gibbs", chains=4, batch=2000,
+           burn_in=200, rhat=1.01, ess=10000, time_budget=10.0,
+           processes=None, seed=None):
+    """
+    Estimate gene and trait probabilities for everyone in `people` by
+    sampling, and return them in the same structure as heredity.main.
+
+    `method` is "likelihood" for likelihood weighting or "gibbs" for
+    Gibbs sampling. `chains` independent chains run in worker processes
+    (`processes` of them, or one per chain; 0 runs every chain in this
+    process), each adding `batch` samples per round. Sampling stops
+    once the samples reach an effective sample size of `ess` (for Gibbs
+    chains, once they hold `ess` samples and their Gelman-Rubin
+    statistic is below `rhat`), or once `time_budget` seconds have
+    passed.
+    """
+    if method not in METHODS:
+        raise ValueError(f"unknown sampling method {method!r}")
+
+    rng = random.Random(seed)
+    states = []
+    for _ in range(chains):
+        states.append((random.Random(rng.getrandbits(64)).getstate(), None))
+    totals = [new_statistics(people) for _ in range(chains)]
+
+    if processes == 0:
+        init_worker(people, probs)
+        pool = None
+    else:
+        pool = multiprocessing.Pool(
+            processes or chains,
+            initializer=init_worker, initargs=(people, probs)
+        )
+
+    # Start with a short round to gauge speed, then size rounds to fit
+    # the remaining time budget
+    start = time.perf_counter()
+    size = min(batch, 100)
+    try:
+        while True:
+
+            # Advance every chain by one batch
+            tasks = [(method, size, burn_in, state) for state in states]
+            if pool is None:
+                results = [run_batch(*task) for task in tasks]
+            else:
+                results = pool.starmap(run_batch, tasks)
+            for c, (statistics, state) in enumerate(results):
+                totals[c] = merge([totals[c], statistics])
+                states[c] = state
+
+            # Check for convergence or an exhausted time budget
+            merged = merge(totals)
+            if method == "gibbs":
+                if merged["samples"] >= ess and gelman_rubin(totals) < rhat:
+                    break
+            elif effective_sample_size(merged) >= ess:
+                break
+            elapsed = time.perf_counter() - start
+            if elapsed >= time_budget:
+                break
+            per_sample = elapsed / totals[0]["samples"]
+            size = max(1, min(batch, int((time_budget - elapsed) / per_sample)))
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+    return estimates(people, probs, merged)
+
+
+def estimates(people, probs, statistics):
+    """
+    Return the `probabilities` structure printed by heredity.main,
+    estimated from sampling `statistics`.
+    """
+    probabilities = dict()
+    for person in people:
+        genes = [
+            value / statistics["weight"]
+            for value in statistics["genes"][person]
+        ]
+        trait = people[person]["trait"]
+        if trait is None:
+            has_trait = statistics["trait"][person] / statistics["weight"]
+        else:
+            has_trait = 1.0 if trait else 0.0
+        probabilities[person] = {
+            "gene": {2: genes[2], 1: genes[1], 0: genes[0]},
+            "trait": {True: has_trait, False: 1 - has_trait}
+        }
+    return probabilities
@@ -0,0 +1,102 @@
+import sys
+import time
+
+from elimination import (
+    EliminationTree, inheritance, pedigree_factors, person_factor,
+    probabilities_from_genes
+)
+from heredity import PROBS, load_data
+
+
+class Session():
+    """
+    Persistent exact inference session over one family.
+
+    The family's clique tree and messages are built once. Adding or
+    retracting one person's trait only replaces that person's factor:
+    upward messages are recomputed on the path from its clique to the
+    root, and other messages and cached marginals are kept wherever the
+    change cannot reach them.
+    """
+
+    def __init__(self, people, probs=PROBS):
+        self.people = {person: dict(people[person]) for person in people}
+        self.probs = probs
+        self.table = inheritance(probs)
+        self.index = {person: k for k, person in enumerate(self.people)}
+        self.tree = EliminationTree(pedigree_factors(self.people, probs))
+        self.tree.calibrate()
+
+        # Gene distributions already computed for the current evidence
+        self.genes = dict()
+
+    def observe(self, person, trait):
+        """
+        Set whether `person` has the trait: True, False, or None if
+        unknown.
+        """
+        if self.people[person]["trait"] == trait:
+            return
+        self.people[person]["trait"] = trait
+        self.tree.replace_factor(
+            self.index[person],
+            person_factor(self.people, person, self.probs, self.table)
+        )
+
+        # Only people in the same connected pedigree are affected
+        root = self.tree.root[person]
+        for other in list(self.genes):
+            if self.tree.root[other] == root:
+                del self.genes[other]
+
+    def retract(self, person):
+        """Forget whether `person` has the trait."""
+        self.observe(person, None)
+
+    def gene_distribution(self, person):
+        """Return the gene distribution of `person`."""
+        if person not in self.genes:
+            self.genes[person] = self.tree.marginal(person)
+        return self.genes[person]
+
+    def probabilities(self):
+        """
+        Return the gene and trait distributions of everyone in the
+        family, in the same structure as heredity.main.
+        """
+        genes = {person: self.gene_distribution(person) for person in self.people}
+        return probabilities_from_genes(self.people, genes, self.probs)
+
+
+def main():
+
+    # Check for proper usage
+    if len(sys.argv) != 2:
+        sys.exit("Usage: python session.py data.csv")
+    session = Session(load_data(sys.argv[1]))
+
+    print("Enter `name 1`, `name 0` or `name ?` to change evidence; blank to quit.")
+    while True:
+        line = input("> ").split()
+        if not line:
+            break
+        if len(line) != 2 or line[0] not in session.people or line[1] not in "10?":
+            print("Invalid input, try again.")
+            continue
+
+        person, value = line
+        start = time.perf_counter()
+        session.observe(person, None if value == "?" else value == "1")
+        probabilities = session.probabilities()
+        elapsed = time.perf_counter() - start
+
+        for person in probabilities:
+            genes = probabilities[person]["gene"]
+            trait = probabilities[person]["trait"][True]
+            print(f"{person}: gene 2 {genes[2]:.4f}, 1 {genes[1]:.4f}, "
+                  f"0 {genes[0]:.4f}; trait {trait:.4f}")
+        print(f"Updated in {elapsed * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
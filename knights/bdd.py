@@ -0,0 +1,349 @@
+from logic import And, Biconditional, Implication, Not, Or, Symbol
+
+
+def variable_order(*sentences):
+    """
+    Returns the symbols of `sentences` in the order they are first met in
+    a depth-first walk. Symbols used together in a subsentence end up
+    close together in the order, which keeps diagrams small.
+    """
+    order = dict()
+    visited = set()
+    stack = list(reversed(sentences))
+    while stack:
+        sentence = stack.pop()
+        if sentence in visited:
+            continue
+        visited.add(sentence)
+        if isinstance(sentence, Symbol):
+            order.setdefault(sentence.name, None)
+        elif isinstance(sentence, Not):
+            stack.append(sentence.operand)
+        elif isinstance(sentence, And):
+            stack.extend(reversed(sentence.conjuncts))
+        elif isinstance(sentence, Or):
+            stack.extend(reversed(sentence.disjuncts))
+        elif isinstance(sentence, Implication):
+            stack.extend([sentence.consequent, sentence.antecedent])
+        elif isinstance(sentence, Biconditional):
+            stack.extend([sentence.right, sentence.left])
+    return list(order)
+
+
+class BDD():
+    """
+    Reduced ordered binary decision diagrams sharing one unique table.
+
+    A diagram is a node number. Nodes 0 and 1 are the false and true
+    terminals. Every other node tests the symbol at its level: `low` is
+    followed when the symbol is false and `high` when it is true. The
+    unique table makes sure equal diagrams are the same node, so
+    equivalence is comparing node numbers. Operations on diagrams are
+    memoized in the manager and shared by every diagram built with it.
+    """
+
+    FALSE = 0
+    TRUE = 1
+
+    def __init__(self, order=()):
+        self.order = []
+        self.levels = dict()
+        self.nodes = [(None, None, None), (None, None, None)]
+        self.unique = dict()
+        self.computed = dict()
+        self.compiled = dict()
+        for name in order:
+            self.add_variable(name)
+
+    def add_variable(self, name):
+        """Add symbol `name` below every existing variable."""
+        if name not in self.levels:
+            self.levels[name] = len(self.order)
+            self.order.append(name)
+
+    def level(self, u):
+        """Return the level of node `u`; terminals come after every level."""
+        level = self.nodes[u][0]
+        return len(self.order) if level is None else level
+
+    def node(self, level, low, high):
+        """Return the node testing `level` with children `low` and `high`."""
+        if low == high:
+            return low
+        key = (level, low, high)
+        u = self.unique.get(key)
+        if u is None:
+            u = len(self.nodes)
+            self.nodes.append(key)
+            self.unique[key] = u
+        return u
+
+    def variable(self, name):
+        """Return the diagram of symbol `name`."""
+        self.add_variable(name)
+        return self.node(self.levels[name], self.FALSE, self.TRUE)
+
+    def negate(self, u):
+        """Return the diagram of not `u`."""
+        if u <= 1:
+            return 1 - u
+
+        # Negate children before their parents, with an explicit stack so
+        # diagrams over any number of variables fit
+        stack = [u]
+        while stack:
+            w = stack[-1]
+            if ("not", w) in self.computed:
+                stack.pop()
+                continue
+            level, low, high = self.nodes[w]
+            children = [
+                child for child in (low, high)
+                if child > 1 and ("not", child) not in self.computed
+            ]
+            if children:
+                stack.extend(children)
+                continue
+            stack.pop()
+            self.computed[("not", w)] = self.node(
+                level, self.negated(low), self.negated(high)
+            )
+        return self.computed[("not", u)]
+
+    def negated(self, u):
+        """Return not `u` if it is a terminal or already computed, else None."""
+        if u <= 1:
+            return 1 - u
+        return self.computed.get(("not", u))
+
+    def apply(self, op, u, v):
+        """Return the diagram of `u` op `v`, for op "and", "or" or "xor"."""
+        if op not in ("and", "or", "xor"):
+            raise ValueError(f"unknown operation: {op}")
+        result = self.applied(op, u, v)
+        if result is not None:
+            return result
+
+        # Split on the topmost variable of each pair, computing both
+        # halves of a pair before the pair itself, with an explicit stack
+        # so diagrams over any number of variables fit
+        stack = [(min(u, v), max(u, v))]
+        while stack:
+            x, y = stack[-1]
+            if (op, x, y) in self.computed:
+                stack.pop()
+                continue
+            level = min(self.level(x), self.level(y))
+            x_low, x_high = self.cofactors(x, level)
+            y_low, y_high = self.cofactors(y, level)
+            low = self.applied(op, x_low, y_low)
+            high = self.applied(op, x_high, y_high)
+            if low is None or high is None:
+                if low is None:
+                    stack.append((min(x_low, y_low), max(x_low, y_low)))
+                if high is None:
+                    stack.append((min(x_high, y_high), max(x_high, y_high)))
+                continue
+            stack.pop()
+            self.computed[(op, x, y)] = self.node(level, low, high)
+        return self.computed[(op, min(u, v), max(u, v))]
+
+    def applied(self, op, u, v):
+        """
+        Return `u` op `v` if it is a terminal case or already computed,
+        else None.
+        """
+        if op == "and":
+            if u == self.FALSE or v == self.FALSE:
+                return self.FALSE
+            if u == self.TRUE or u == v:
+                return v
+            if v == self.TRUE:
+                return u
+        elif op == "or":
+            if u == self.TRUE or v == self.TRUE:
+                return self.TRUE
+            if u == self.FALSE or u == v:
+                return v
+            if v == self.FALSE:
+                return u
+        else:
+            if u == v:
+                return self.FALSE
+            if u == self.FALSE:
+                return v
+            if v == self.FALSE:
+                return u
+            if u == self.TRUE:
+                return self.negate(v)
+            if v == self.TRUE:
+                return self.negate(u)
+
+        # Every operation is commutative
+        return self.computed.get((op, min(u, v), max(u, v)))
+
+    def cofactors(self, u, level):
+        """Return `u` with the variable at `level` false, and true."""
+        if self.level(u) != level:
+            return u, u
+        _, low, high = self.nodes[u]
+        return low, high
+
+    def compile(self, sentence):
+        """Return the diagram of a logical sentence."""
+        if sentence in self.compiled:
+            return self.compiled[sentence]
+
+        if isinstance(sentence, Symbol):
+            u = self.variable(sentence.name)
+        elif isinstance(sentence, Not):
+            u = self.negate(self.compile(sentence.operand))
+        elif isinstance(sentence, And):
+            u = self.combine("and", sentence.conjuncts)
+        elif isinstance(sentence, Or):
+            u = self.combine("or", sentence.disjuncts)
+        elif isinstance(sentence, Implication):
+            u = self.apply(
+                "or",
+                self.negate(self.compile(sentence.antecedent)),
+                self.compile(sentence.consequent)
+            )
+        elif isinstance(sentence, Biconditional):
+            u = self.negate(self.apply(
+                "xor", self.compile(sentence.left), self.compile(sentence.right)
+            ))
+        else:
+            raise TypeError("must be a logical sentence")
+
+        self.compiled[sentence] = u
+        return u
+
+    def combine(self, op, sentences):
+        """
+        Return the diagram of `sentences` joined by op "and" or "or".
+
+        Operands are joined in order of the deepest variable they test, so
+        the result is built from the top of the order down and variables
+        that no later operand tests are settled early. Joining in the
+        order given can build intermediate diagrams many times larger
+        than the result.
+        """
+        operands = sorted(
+            (self.compile(sentence) for sentence in sentences), key=self.depth
+        )
+        identity, absorbing = (
+            (self.TRUE, self.FALSE) if op == "and" else (self.FALSE, self.TRUE)
+        )
+        u = identity
+        for v in operands:
+            u = self.apply(op, u, v)
+            if u == absorbing:
+                break
+        return u
+
+    def depth(self, u):
+        """Return the deepest level diagram `u` tests, or -1 if none."""
+        deepest = -1
+        seen = set()
+        stack = [u]
+        while stack:
+            u = stack.pop()
+            if u <= 1 or u in seen:
+                continue
+            seen.add(u)
+            level, low, high = self.nodes[u]
+            deepest = max(deepest, level)
+            stack.extend([low, high])
+        return deepest
+
+    def restrict(self, u, assumptions):
+        """
+        Return diagram `u` conditioned on `assumptions`, a dictionary
+        mapping symbol names to True or False.
+        """
+        levels = {
+            self.levels[name]: value for name, value in assumptions.items()
+            if name in self.levels
+        }
+        memo = {self.FALSE: self.FALSE, self.TRUE: self.TRUE}
+
+        # Restrict children before their parents, with an explicit stack
+        stack = [u]
+        while stack:
+            w = stack[-1]
+            if w in memo:
+                stack.pop()
+                continue
+            level, low, high = self.nodes[w]
+            if level in levels:
+                children = (high if levels[level] else low,)
+            else:
+                children = (low, high)
+            missing = [child for child in children if child not in memo]
+            if missing:
+                stack.extend(missing)
+                continue
+            stack.pop()
+            if level in levels:
+                memo[w] = memo[children[0]]
+            else:
+                memo[w] = self.node(level, memo[low], memo[high])
+        return memo[u]
+
+    def entails(self, u, v):
+        """Return whether every model of `u` is a model of `v`."""
+        return self.apply("and", u, self.negate(v)) == self.FALSE
+
+    def count(self, u):
+        """Return the number of models of `u` over every variable."""
+        memo = {self.FALSE: 0, self.TRUE: 1}
+
+        # Count children before their parents, with an explicit stack
+        stack = [u]
+        while stack:
+            w = stack[-1]
+            if w in memo:
+                stack.pop()
+                continue
+            level, low, high = self.nodes[w]
+            missing = [child for child in (low, high) if child not in memo]
+            if missing:
+                stack.extend(missing)
+                continue
+            stack.pop()
+            memo[w] = (
+                memo[low] << (self.level(low) - level - 1)
+            ) + (
+                memo[high] << (self.level(high) - level - 1)
+            )
+        return memo[u] << self.level(u)
+
+    def size(self, u):
+        """Return the number of nodes in diagram `u`, terminals included."""
+        seen = set()
+        stack = [u]
+        while stack:
+            u = stack.pop()
+            if u in seen:
+                continue
+            seen.add(u)
+            if u > 1:
+                stack.extend(self.nodes[u][1:])
+        return len(seen)
+
+
+def bdd_entails(knowledge, query):
+    """Checks if knowledge base entails query, by comparing their diagrams."""
+    bdd = BDD(variable_order(knowledge, query))
+    return bdd.entails(bdd.compile(knowledge), bdd.compile(query))
+
+
+def bdd_entails_all(knowledge, queries):
+    """
+    Checks which of queries the knowledge base entails, compiling the
+    knowledge base once. Returns a list of booleans, one per query.
+    """
+    queries = list(queries)
+    bdd = BDD(variable_order(knowledge, *queries))
+    compiled = bdd.compile(knowledge)
+    return [bdd.entails(compiled, bdd.compile(query)) for query in queries]
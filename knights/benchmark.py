@@ -0,0 +1,143 @@
+import json
+import multiprocessing
+import queue
+import random
+import sys
+import time
+
+from bdd import bdd_entails_all
+from generator import generate_puzzle
+from logic import model_check, model_check_all
+from sat import sat_entails_all
+
+# Puzzle configuration: numbers of inhabitants, how deep statements nest,
+# and how many puzzles of each size to generate
+SIZES = [2, 3, 4, 6, 8, 10, 12, 16, 24, 32, 48, 64, 96, 128, 256, 512]
+DEPTH = 2
+PUZZLES_PER_SIZE = 3
+SEED = 0
+
+# Seconds an engine may spend on one puzzle before it is abandoned; an
+# engine that runs out of time is not tried on larger puzzles
+TIME_LIMIT = 10
+
+# Entailment engines, each mapping a knowledge base and a list of
+# queries to whether each query is entailed
+ENGINES = {
+    "model_check": lambda knowledge, queries: [
+        model_check(knowledge, query) for query in queries
+    ],
+    "model_check_all": model_check_all,
+    "sat": sat_entails_all,
+    "bdd": bdd_entails_all
+}
+
+
+def solve_case(puzzle, engine, results):
+    """
+    Ask engine `engine` which of the puzzle's symbols its knowledge base
+    entails, putting the answers and elapsed time onto queue `results`.
+    """
+    start = time.perf_counter()
+    entailed = ENGINES[engine](puzzle["knowledge"], puzzle["symbols"])
+    elapsed = time.perf_counter() - start
+    results.put({"entailed": entailed, "time": elapsed})
+
+
+def run_case(puzzle, engine, time_limit=TIME_LIMIT):
+    """
+    Time engine `engine` on `puzzle` in a separate process, abandoning it
+    after `time_limit` seconds. Return a dictionary describing the run.
+    """
+    results = multiprocessing.Queue()
+    process = multiprocessing.Process(
+        target=solve_case, args=(puzzle, engine, results)
+    )
+    process.start()
+    try:
+        outcome = results.get(timeout=time_limit)
+    except queue.Empty:
+        outcome = {"entailed": None, "time": None, "timeout": True}
+    process.join(1)
+    if process.is_alive():
+        process.terminate()
+        process.join()
+    outcome["engine"] = engine
+    return outcome
+
+
+def check(puzzle, runs):
+    """
+    Return whether every finished run in `runs` gave the same answers,
+    and every entailed symbol is true in the puzzle's hidden solution.
+    """
+    answers = [run["entailed"] for run in runs if not run.get("timeout")]
+    if any(answer != answers[0] for answer in answers):
+        return False
+    return all(
+        puzzle["solution"][symbol.name]
+        for answer in answers
+        for symbol, entailed in zip(puzzle["symbols"], answer)
+        if entailed
+    )
+
+
+def run(sizes=SIZES, engines=ENGINES, seed=SEED, time_limit=TIME_LIMIT):
+    """
+    Time every engine in `engines` on generated puzzles of each size in
+    `sizes`, cross-checking their answers. Print one line per run and
+    return the list of runs.
+    """
+    rng = random.Random(seed)
+    active = list(engines)
+    runs = []
+    for size in sizes:
+        for k in range(PUZZLES_PER_SIZE):
+            puzzle = generate_puzzle(size, rng, DEPTH)
+            results = [run_case(puzzle, engine, time_limit) for engine in active]
+            agrees = check(puzzle, results)
+
+            for result in results:
+                result.update({"size": size, "puzzle": k, "agrees": agrees})
+                runs.append(result)
+                if result.get("timeout"):
+                    print(f"{size:4} {k:2} {result['engine']:16} timed out")
+                else:
+                    entailed = sum(result["entailed"])
+                    print(f"{size:4} {k:2} {result['engine']:16} "
+                          f"{result['time']:9.4f}s entailed={entailed:<4} "
+                          f"{'ok' if agrees else 'MISMATCH'}")
+
+        # Drop engines that ran out of time on this size
+        active = [
+            engine for engine in active
+            if not any(
+                r.get("timeout") for r in runs
+                if r["size"] == size and r["engine"] == engine
+            )
+        ]
+        if not active:
+            break
+    return runs
+
+
+def main():
+
+    # Check for proper usage
+    if len(sys.argv) not in [1, 2, 3]:
+        sys.exit("Usage: python benchmark.py [seed] [results.json]")
+    seed = int(sys.argv[1]) if len(sys.argv) >= 2 else SEED
+
+    runs = run(seed=seed)
+
+    # Save results
+    if len(sys.argv) == 3:
+        with open(sys.argv[2], "w") as f:
+            json.dump(runs, f, indent=4)
+
+    if not all(run["agrees"] for run in runs):
+        sys.exit("Entailment engines disagree.")
+
+
+if __name__ == "__main__":
+    main()
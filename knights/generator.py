@@ -0,0 +1,108 @@
+import random
+import string
+import sys
+
+from logic import And, Biconditional, Implication, Not, Or, Symbol
+
+# Chance a statement stops nesting before reaching the maximum depth
+ATOM = 0.3
+
+# Ways a statement combines smaller statements
+CONNECTIVES = ["not", "and", "or", "if", "iff", "says"]
+
+
+def inhabitant(k):
+    """Return the name of the k-th inhabitant: A to Z, then A1 to Z1, ..."""
+    letter = string.ascii_uppercase[k % 26]
+    return letter if k < 26 else f"{letter}{k // 26}"
+
+
+def random_statement(knights, knaves, depth, rng):
+    """
+    Return a random statement about the inhabitants, nested up to `depth`
+    connectives deep.
+    """
+    if depth == 0 or rng.random() < ATOM:
+        return rng.choice([knights, knaves])[rng.randrange(len(knights))]
+
+    connective = rng.choice(CONNECTIVES)
+    if connective == "not":
+        return Not(random_statement(knights, knaves, depth - 1, rng))
+    if connective == "says":
+
+        # "X says S" is true exactly when X is a knight and S is true,
+        # or X is a knave and S is false
+        speaker = rng.choice(knights)
+        return Biconditional(
+            speaker, random_statement(knights, knaves, depth - 1, rng)
+        )
+
+    left = random_statement(knights, knaves, depth - 1, rng)
+    right = random_statement(knights, knaves, depth - 1, rng)
+    if connective == "and":
+        return And(left, right)
+    if connective == "or":
+        return Or(left, right)
+    if connective == "if":
+        return Implication(left, right)
+    return Biconditional(left, right)
+
+
+def generate_puzzle(size, rng, depth=2, statements=1):
+    """
+    Return a random knights-and-knaves puzzle with `size` inhabitants,
+    each making `statements` statements nested up to `depth` deep.
+
+    A hidden solution is chosen first, and any statement that would
+    contradict it is negated, so every puzzle is consistent. Returns a
+    dictionary of: the knowledge base, its symbols, the statements as
+    `(speaker, statement)` pairs, and the hidden solution as a model.
+    """
+    names = [inhabitant(k) for k in range(size)]
+    knights = [Symbol(f"{name} is a Knight") for name in names]
+    knaves = [Symbol(f"{name} is a Knave") for name in names]
+    solution = dict()
+    for knight, knave in zip(knights, knaves):
+        solution[knight.name] = rng.random() < 0.5
+        solution[knave.name] = not solution[knight.name]
+
+    conjuncts = []
+    for knight, knave in zip(knights, knaves):
+        conjuncts.append(Or(knight, knave))
+        conjuncts.append(Not(And(knight, knave)))
+
+    said = []
+    for name, knight, knave in zip(names, knights, knaves):
+        for _ in range(statements):
+            statement = random_statement(knights, knaves, depth, rng)
+            if statement.evaluate(solution) != solution[knight.name]:
+                statement = Not(statement)
+            said.append((name, statement))
+            conjuncts.append(Implication(knight, statement))
+            conjuncts.append(Implication(knave, Not(statement)))
+
+    symbols = [symbol for pair in zip(knights, knaves) for symbol in pair]
+    return {
+        "knowledge": And(*conjuncts),
+        "symbols": symbols,
+        "statements": said,
+        "solution": solution
+    }
+
+
+def main():
+
+    # Check for proper usage
+    if len(sys.argv) not in [2, 3, 4]:
+        sys.exit("Usage: python generator.py size [depth] [seed]")
+    size = int(sys.argv[1])
+    depth = int(sys.argv[2]) if len(sys.argv) >= 3 else 2
+    seed = int(sys.argv[3]) if len(sys.argv) == 4 else None
+
+    puzzle = generate_puzzle(size, random.Random(seed), depth)
+    for name, statement in puzzle["statements"]:
+        print(f"{name} says \"{statement.formula()}\"")
+
+
+if __name__ == "__main__":
+    main()
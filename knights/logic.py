@@ -1,19 +1,73 @@
+import collections
 import itertools
+import weakref
+
+# Symbols evaluated together, as one block of 2^BLOCK_SYMBOLS models
+BLOCK_SYMBOLS = 16
 
 
 class Sentence():
+    """
+    Immutable logical sentence.
+
+    Sentences are interned: constructing a sentence that is structurally
+    equal to one that already exists returns the existing node, so
+    equality is identity. Each node computes its hash and its set of
+    symbols once, when it is created.
+    """
+
+    __slots__ = ("_hash", "_symbols", "__weakref__")
+
+    # Every live sentence node, by structure
+    _nodes = weakref.WeakValueDictionary()
+
+    @classmethod
+    def intern(cls, key):
+        """
+        Returns the node of class `cls` with structure `key`, and whether
+        it was just created (and so still needs its fields set).
+        """
+        node = Sentence._nodes.get(key)
+        if node is not None:
+            return node, False
+        node = object.__new__(cls)
+        node._hash = hash(key)
+        Sentence._nodes[key] = node
+        return node, True
+
+    def __hash__(self):
+        return self._hash
 
     def evaluate(self, model):
         """Evaluates the logical sentence."""
         raise Exception("nothing to evaluate")
 
+    def evaluate_partial(self, model):
+        """
+        Evaluates the logical sentence in a partial model: returns True or
+        False if every completion of the model agrees, and None if the
+        value depends on symbols the model does not assign.
+        """
+        raise Exception("nothing to evaluate")
+
+    def compile(self):
+        """
+        Returns a bit-parallel evaluator for the logical sentence.
+
+        The evaluator takes `columns`, mapping each symbol to an integer
+        whose bits are that symbol's value in a block of models, and
+        `mask`, with one bit set per model in the block. It returns the
+        bits of the models in which the sentence is true.
+        """
+        raise Exception("nothing to compile")
+
     def formula(self):
         """Returns string formula representing logical sentence."""
         return ""
 
     def symbols(self):
-        """Returns a set of all symbols in the logical sentence."""
-        return set()
+        """Returns a frozen set of all symbols in the logical sentence."""
+        return self._symbols
 
     @classmethod
     def validate(cls, sentence):
@@ -43,15 +97,17 @@ class Sentence():
 
 
 class Symbol(Sentence):
+    __slots__ = ("name",)
 
-    def __init__(self, name):
-        self.name = name
-
-    def __eq__(self, other):
-        return isinstance(other, Symbol) and self.name == other.name
+    def __new__(cls, name):
+        node, created = cls.intern(("symbol", name))
+        if created:
+            node.name = name
+            node._symbols = frozenset([name])
+        return node
 
-    def __hash__(self):
-        return hash(("symbol", self.name))
+    def __reduce__(self):
+        return (Symbol, (self.name,))
 
     def __repr__(self):
         return self.name
@@ -62,23 +118,36 @@ class Symbol(Sentence):
         except KeyError:
             raise Exception(f"variable {self.name} not in model")
 
+    def evaluate_partial(self, model):
+        return model.get(self.name)
+
+    def compile(self):
+        name = self.name
+
+        def evaluate(columns, mask):
+            try:
+                return columns[name]
+            except KeyError:
+                raise Exception(f"variable {name} not in model")
+        return evaluate
+
     def formula(self):
         return self.name
 
-    def symbols(self):
-        return {self.name}
-
 
 class Not(Sentence):
-    def __init__(self, operand):
-        Sentence.validate(operand)
-        self.operand = operand
+    __slots__ = ("operand",)
 
-    def __eq__(self, other):
-        return isinstance(other, Not) and self.operand == other.operand
+    def __new__(cls, operand):
+        Sentence.validate(operand)
+        node, created = cls.intern(("not", operand))
+        if created:
+            node.operand = operand
+            node._symbols = operand.symbols()
+        return node
 
-    def __hash__(self):
-        return hash(("not", hash(self.operand)))
+    def __reduce__(self):
+        return (Not, (self.operand,))
 
     def __repr__(self):
         return f"Not({self.operand})"
@@ -86,26 +155,34 @@ class Not(Sentence):
     def evaluate(self, model):
         return not self.operand.evaluate(model)
 
+    def evaluate_partial(self, model):
+        value = self.operand.evaluate_partial(model)
+        return None if value is None else not value
+
+    def compile(self):
+        operand = self.operand.compile()
+        return lambda columns, mask: operand(columns, mask) ^ mask
+
     def formula(self):
         return "¬" + Sentence.parenthesize(self.operand.formula())
 
-    def symbols(self):
-        return self.operand.symbols()
-
 
 class And(Sentence):
-    def __init__(self, *conjuncts):
+    __slots__ = ("conjuncts",)
+
+    def __new__(cls, *conjuncts):
         for conjunct in conjuncts:
             Sentence.validate(conjunct)
-        self.conjuncts = list(conjuncts)
-
-    def __eq__(self, other):
-        return isinstance(other, And) and self.conjuncts == other.conjuncts
+        node, created = cls.intern(("and", conjuncts))
+        if created:
+            node.conjuncts = conjuncts
+            node._symbols = frozenset().union(
+                *[conjunct.symbols() for conjunct in conjuncts]
+            )
+        return node
 
-    def __hash__(self):
-        return hash(
-            ("and", tuple(hash(conjunct) for conjunct in self.conjuncts))
-        )
+    def __reduce__(self):
+        return (And, self.conjuncts)
 
     def __repr__(self):
         conjunctions = ", ".join(
@@ -113,36 +190,73 @@ class And(Sentence):
         )
         return f"And({conjunctions})"
 
-    def add(self, conjunct):
-        Sentence.validate(conjunct)
-        self.conjuncts.append(conjunct)
+    def add(self, *conjuncts):
+        """
+        Sentences are immutable, so a conjunction cannot be added to.
+        Raises TypeError rather than silently dropping `conjuncts`.
+        """
+        raise TypeError(
+            "And is immutable: build the conjunction once with "
+            "And(*conjuncts), use And.extended(*conjuncts) for a copy "
+            "with more conjuncts, or KnowledgeBase.tell to add knowledge"
+        )
+
+    def extended(self, *conjuncts):
+        """
+        Returns a new conjunction with `conjuncts` added. To build a large
+        knowledge base, collect the conjuncts in a list and create the
+        conjunction once, with And(*conjuncts).
+        """
+        return And(*self.conjuncts, *conjuncts)
 
     def evaluate(self, model):
         return all(conjunct.evaluate(model) for conjunct in self.conjuncts)
 
+    def evaluate_partial(self, model):
+        result = True
+        for conjunct in self.conjuncts:
+            value = conjunct.evaluate_partial(model)
+            if value is False:
+                return False
+            if value is None:
+                result = None
+        return result
+
+    def compile(self):
+        conjuncts = [conjunct.compile() for conjunct in self.conjuncts]
+
+        def evaluate(columns, mask):
+            result = mask
+            for conjunct in conjuncts:
+                result &= conjunct(columns, mask)
+                if not result:
+                    break
+            return result
+        return evaluate
+
     def formula(self):
         if len(self.conjuncts) == 1:
             return self.conjuncts[0].formula()
         return " ∧ ".join([Sentence.parenthesize(conjunct.formula())
                            for conjunct in self.conjuncts])
 
-    def symbols(self):
-        return set.union(*[conjunct.symbols() for conjunct in self.conjuncts])
-
 
 class Or(Sentence):
-    def __init__(self, *disjuncts):
+    __slots__ = ("disjuncts",)
+
+    def __new__(cls, *disjuncts):
         for disjunct in disjuncts:
             Sentence.validate(disjunct)
-        self.disjuncts = list(disjuncts)
-
-    def __eq__(self, other):
-        return isinstance(other, Or) and self.disjuncts == other.disjuncts
+        node, created = cls.intern(("or", disjuncts))
+        if created:
+            node.disjuncts = disjuncts
+            node._symbols = frozenset().union(
+                *[disjunct.symbols() for disjunct in disjuncts]
+            )
+        return node
 
-    def __hash__(self):
-        return hash(
-            ("or", tuple(hash(disjunct) for disjunct in self.disjuncts))
-        )
+    def __reduce__(self):
+        return (Or, self.disjuncts)
 
     def __repr__(self):
         disjuncts = ", ".join([str(disjunct) for disjunct in self.disjuncts])
@@ -151,30 +265,50 @@ class Or(Sentence):
     def evaluate(self, model):
         return any(disjunct.evaluate(model) for disjunct in self.disjuncts)
 
+    def evaluate_partial(self, model):
+        result = False
+        for disjunct in self.disjuncts:
+            value = disjunct.evaluate_partial(model)
+            if value is True:
+                return True
+            if value is None:
+                result = None
+        return result
+
+    def compile(self):
+        disjuncts = [disjunct.compile() for disjunct in self.disjuncts]
+
+        def evaluate(columns, mask):
+            result = 0
+            for disjunct in disjuncts:
+                result |= disjunct(columns, mask)
+                if result == mask:
+                    break
+            return result
+        return evaluate
+
     def formula(self):
         if len(self.disjuncts) == 1:
             return self.disjuncts[0].formula()
         return " ∨  ".join([Sentence.parenthesize(disjunct.formula())
                             for disjunct in self.disjuncts])
 
-    def symbols(self):
-        return set.union(*[disjunct.symbols() for disjunct in self.disjuncts])
-
 
 class Implication(Sentence):
-    def __init__(self, antecedent, consequent):
+    __slots__ = ("antecedent", "consequent")
+
+    def __new__(cls, antecedent, consequent):
         Sentence.validate(antecedent)
         Sentence.validate(consequent)
-        self.antecedent = antecedent
-        self.consequent = consequent
+        node, created = cls.intern(("implies", antecedent, consequent))
+        if created:
+            node.antecedent = antecedent
+            node.consequent = consequent
+            node._symbols = antecedent.symbols() | consequent.symbols()
+        return node
 
-    def __eq__(self, other):
-        return (isinstance(other, Implication)
-                and self.antecedent == other.antecedent
-                and self.consequent == other.consequent)
-
-    def __hash__(self):
-        return hash(("implies", hash(self.antecedent), hash(self.consequent)))
+    def __reduce__(self):
+        return (Implication, (self.antecedent, self.consequent))
 
     def __repr__(self):
         return f"Implication({self.antecedent}, {self.consequent})"
@@ -183,29 +317,45 @@ class Implication(Sentence):
         return ((not self.antecedent.evaluate(model))
                 or self.consequent.evaluate(model))
 
+    def evaluate_partial(self, model):
+        antecedent = self.antecedent.evaluate_partial(model)
+        if antecedent is False:
+            return True
+        consequent = self.consequent.evaluate_partial(model)
+        if consequent is True:
+            return True
+        if antecedent is None or consequent is None:
+            return None
+        return False
+
+    def compile(self):
+        antecedent = self.antecedent.compile()
+        consequent = self.consequent.compile()
+        return lambda columns, mask: (
+            (antecedent(columns, mask) ^ mask) | consequent(columns, mask)
+        )
+
     def formula(self):
         antecedent = Sentence.parenthesize(self.antecedent.formula())
         consequent = Sentence.parenthesize(self.consequent.formula())
         return f"{antecedent} => {consequent}"
 
-    def symbols(self):
-        return set.union(self.antecedent.symbols(), self.consequent.symbols())
-
 
 class Biconditional(Sentence):
-    def __init__(self, left, right):
+    __slots__ = ("left", "right")
+
+    def __new__(cls, left, right):
         Sentence.validate(left)
         Sentence.validate(right)
-        self.left = left
-        self.right = right
-
-    def __eq__(self, other):
-        return (isinstance(other, Biconditional)
-                and self.left == other.left
-                and self.right == other.right)
+        node, created = cls.intern(("biconditional", left, right))
+        if created:
+            node.left = left
+            node.right = right
+            node._symbols = left.symbols() | right.symbols()
+        return node
 
-    def __hash__(self):
-        return hash(("biconditional", hash(self.left), hash(self.right)))
+    def __reduce__(self):
+        return (Biconditional, (self.left, self.right))
 
     def __repr__(self):
         return f"Biconditional({self.left}, {self.right})"
@@ -216,48 +366,179 @@ class Biconditional(Sentence):
                 or (not self.left.evaluate(model)
                     and not self.right.evaluate(model)))
 
+    def evaluate_partial(self, model):
+        left = self.left.evaluate_partial(model)
+        if left is None:
+            return None
+        right = self.right.evaluate_partial(model)
+        if right is None:
+            return None
+        return left == right
+
+    def compile(self):
+        left = self.left.compile()
+        right = self.right.compile()
+        return lambda columns, mask: (
+            left(columns, mask) ^ right(columns, mask) ^ mask
+        )
+
     def formula(self):
         left = Sentence.parenthesize(str(self.left))
         right = Sentence.parenthesize(str(self.right))
         return f"{left} <=> {right}"
 
-    def symbols(self):
-        return set.union(self.left.symbols(), self.right.symbols())
+
+def block_columns(symbols):
+    """
+    Returns the columns and mask for a block of every model of `symbols`,
+    model k assigning the i-th symbol bit i of k.
+    """
+    size = 1 << len(symbols)
+    mask = (1 << size) - 1
+    columns = dict()
+    for i, symbol in enumerate(symbols):
+        width = 1 << i
+        ones = ((1 << width) - 1) << width
+        columns[symbol] = ones * (mask // ((1 << 2 * width) - 1))
+    return columns, mask
+
+
+def symbol_order(knowledge, query):
+    """
+    Returns the symbols of knowledge and query in the order model_check
+    should assign them: query symbols first, since fixing them settles
+    the query, then the rest by how often they occur, most often first.
+    """
+    counts = collections.Counter()
+    stack = [knowledge, query]
+    while stack:
+        sentence = stack.pop()
+        if isinstance(sentence, Symbol):
+            counts[sentence.name] += 1
+        elif isinstance(sentence, Not):
+            stack.append(sentence.operand)
+        elif isinstance(sentence, And):
+            stack.extend(sentence.conjuncts)
+        elif isinstance(sentence, Or):
+            stack.extend(sentence.disjuncts)
+        elif isinstance(sentence, Implication):
+            stack.extend([sentence.antecedent, sentence.consequent])
+        elif isinstance(sentence, Biconditional):
+            stack.extend([sentence.left, sentence.right])
+    return sorted(
+        counts, key=lambda name: (name not in query.symbols(), -counts[name], name)
+    )
 
 
 def model_check(knowledge, query):
     """Checks if knowledge base entails query."""
 
-    def check_all(knowledge, query, symbols, model):
-        """Checks if knowledge base entails query, given a particular model."""
-
-        # If model has an assignment for each symbol
-        if not symbols:
+    def check_all(symbols, model):
+        """Checks if knowledge base entails query, given a partial model."""
 
-            # If knowledge base is true in model, then query must also be true
-            if knowledge.evaluate(model):
-                return query.evaluate(model)
+        # Knowledge base is false in every completion of the model
+        if knowledge.evaluate_partial(model) is False:
             return True
-        else:
-
-            # Choose one of the remaining unused symbols
-            remaining = symbols.copy()
-            p = remaining.pop()
 
-            # Create a model where the symbol is true
-            model_true = model.copy()
-            model_true[p] = True
+        # Query is true in every completion of the model
+        query_value = query.evaluate_partial(model)
+        if query_value is True:
+            return True
 
-            # Create a model where the symbol is false
-            model_false = model.copy()
-            model_false[p] = False
+        # If model has an assignment for each symbol outside the block
+        if not symbols:
+            known = knowledge_bits(columns, mask)
 
-            # Ensure entailment holds in both models
-            return (check_all(knowledge, query, remaining, model_true) and
-                    check_all(knowledge, query, remaining, model_false))
+            # Query is false in the whole block, so knowledge must be too
+            if query_value is False:
+                return not known
 
-    # Get all symbols in both knowledge and query
-    symbols = set.union(knowledge.symbols(), query.symbols())
+            # In every model where knowledge base is true, query must be true
+            return not known & (query_bits(columns, mask) ^ mask)
 
-    # Check that knowledge entails query
-    return check_all(knowledge, query, symbols, dict())
+        # Assign the next symbol each way, undoing the assignment after
+        p = symbols[-1]
+        symbols.pop()
+        try:
+            for value in (True, False):
+                model[p] = value
+                columns[p] = mask if value else 0
+                if not check_all(symbols, model):
+                    return False
+            return True
+        finally:
+            del model[p]
+            symbols.append(p)
+
+    # Get all symbols in both knowledge and query, in assignment order
+    symbols = symbol_order(knowledge, query)
+
+    # Evaluate blocks of up to 2^BLOCK_SYMBOLS models at once
+    split = max(0, len(symbols) - BLOCK_SYMBOLS)
+    columns, mask = block_columns(symbols[split:])
+    knowledge_bits = knowledge.compile()
+    query_bits = query.compile()
+
+    # Check that knowledge entails query, assigning symbols from the front
+    return check_all(symbols[:split][::-1], dict())
+
+
+def model_check_all(knowledge, queries):
+    """
+    Checks which of queries the knowledge base entails, enumerating the
+    models of the knowledge base once for all of them. Returns a list of
+    booleans, one per query.
+    """
+    queries = list(queries)
+    entailed = [True] * len(queries)
+
+    def check_all(symbols, model, pending):
+        """
+        Marks as not entailed the pending queries that are false in some
+        model of the knowledge base that extends a partial model.
+        """
+
+        # Knowledge base is false in every completion of the model
+        if knowledge.evaluate_partial(model) is False:
+            return
+
+        # Only queries not yet refuted or settled true can be refuted here
+        pending = [
+            k for k in pending
+            if entailed[k] and queries[k].evaluate_partial(model) is not True
+        ]
+        if not pending:
+            return
+
+        # If model has an assignment for each symbol outside the block
+        if not symbols:
+            known = knowledge_bits(columns, mask)
+            if known:
+                for k in pending:
+                    if known & (query_bits[k](columns, mask) ^ mask):
+                        entailed[k] = False
+            return
+
+        # Assign the next symbol each way, undoing the assignment after
+        p = symbols[-1]
+        symbols.pop()
+        try:
+            for value in (True, False):
+                model[p] = value
+                columns[p] = mask if value else 0
+                check_all(symbols, model, pending)
+        finally:
+            del model[p]
+            symbols.append(p)
+
+    # Get all symbols, in assignment order
+    symbols = symbol_order(knowledge, And(*queries))
+
+    # Evaluate blocks of up to 2^BLOCK_SYMBOLS models at once
+    split = max(0, len(symbols) - BLOCK_SYMBOLS)
+    columns, mask = block_columns(symbols[split:])
+    knowledge_bits = knowledge.compile()
+    query_bits = [query.compile() for query in queries]
+
+    check_all(symbols[:split][::-1], dict(), range(len(queries)))
+    return entailed
@@ -1,4 +1,15 @@
+import sys
+
+from bdd import bdd_entails_all
 from logic import *
+from sat import sat_entails_all
+
+# Entailment checkers puzzle.py can use, each checking many queries at once
+ENGINES = {
+    "model_check": model_check_all,
+    "sat": sat_entails_all,
+    "bdd": bdd_entails_all
+}
 
 AKnight = Symbol("A is a Knight")
 AKnave = Symbol("A is a Knave")
@@ -74,6 +85,15 @@ knowledge3 = And(
 
 
 def main():
+
+    # Check for proper usage
+    if len(sys.argv) not in [1, 2]:
+        sys.exit("Usage: python puzzle.py [model_check|sat|bdd]")
+    engine = sys.argv[1] if len(sys.argv) == 2 else "model_check"
+    if engine not in ENGINES:
+        sys.exit(f"Unknown engine: {engine}")
+    entails_all = ENGINES[engine]
+
     symbols = [AKnight, AKnave, BKnight, BKnave, CKnight, CKnave]
     puzzles = [
         ("Puzzle 0", knowledge0),
@@ -86,8 +106,9 @@ def main():
         if len(knowledge.conjuncts) == 0:
             print("    Not yet implemented.")
         else:
-            for symbol in symbols:
-                if model_check(knowledge, symbol):
+            entailed = entails_all(knowledge, symbols)
+            for symbol, entails in zip(symbols, entailed):
+                if entails:
                     print(f"    {symbol}")
 
 
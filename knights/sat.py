@@ -0,0 +1,522 @@
+import heapq
+
+from logic import And, Biconditional, Implication, Not, Or, Symbol
+
+
+class CNF():
+    """
+    Tseitin encoding of logical sentences into clauses.
+
+    Symbols and subsentences are numbered as variables 1, 2, ...; a
+    literal is a variable number, negated for a negative literal, and a
+    clause is a list of literals. Each compound subsentence gets one new
+    variable constrained to equal it, so the encoding grows linearly with
+    the size of the sentence. Structurally equal subsentences share a
+    variable.
+    """
+
+    def __init__(self):
+        self.variables = dict()
+        self.names = dict()
+        self.clauses = []
+        self.cache = dict()
+        self.count = 0
+
+    def new_variable(self):
+        """Return a fresh variable number."""
+        self.count += 1
+        return self.count
+
+    def symbol(self, name):
+        """Return the variable for the symbol called `name`."""
+        if name not in self.variables:
+            self.variables[name] = self.new_variable()
+            self.names[self.variables[name]] = name
+        return self.variables[name]
+
+    def literal(self, sentence):
+        """
+        Return a literal equivalent to `sentence`, adding the clauses
+        that define it.
+        """
+        if isinstance(sentence, Symbol):
+            return self.symbol(sentence.name)
+        if isinstance(sentence, Not):
+            return -self.literal(sentence.operand)
+        if sentence in self.cache:
+            return self.cache[sentence]
+
+        x = self.new_variable()
+        if isinstance(sentence, And):
+            parts = [self.literal(c) for c in sentence.conjuncts]
+            for p in parts:
+                self.clauses.append([-x, p])
+            self.clauses.append([x] + [-p for p in parts])
+        elif isinstance(sentence, Or):
+            parts = [self.literal(d) for d in sentence.disjuncts]
+            for p in parts:
+                self.clauses.append([x, -p])
+            self.clauses.append([-x] + parts)
+        elif isinstance(sentence, Implication):
+            a = self.literal(sentence.antecedent)
+            b = self.literal(sentence.consequent)
+            self.clauses.append([-x, -a, b])
+            self.clauses.append([x, a])
+            self.clauses.append([x, -b])
+        elif isinstance(sentence, Biconditional):
+            a = self.literal(sentence.left)
+            b = self.literal(sentence.right)
+            self.clauses.append([-x, -a, b])
+            self.clauses.append([-x, a, -b])
+            self.clauses.append([x, a, b])
+            self.clauses.append([x, -a, -b])
+        else:
+            raise TypeError("must be a logical sentence")
+
+        self.cache[sentence] = x
+        return x
+
+    def assertion(self, sentence):
+        """
+        Return clauses asserting that `sentence` is true. Only the clauses
+        defining its subsentences are added.
+        """
+        if isinstance(sentence, And):
+            return [
+                clause for conjunct in sentence.conjuncts
+                for clause in self.assertion(conjunct)
+            ]
+        if isinstance(sentence, Or):
+            return [[self.literal(d) for d in sentence.disjuncts]]
+        return [[self.literal(sentence)]]
+
+    def add(self, sentence):
+        """
+        Add clauses asserting that `sentence` is true. Return the new
+        assertion clauses.
+        """
+        clauses = self.assertion(sentence)
+        self.clauses.extend(clauses)
+        return clauses
+
+
+class Solver():
+    """
+    Conflict-driven clause learning SAT solver.
+
+    Unit propagation uses two watched literals per clause. Conflicts are
+    analyzed to their first unique implication point, the learned clause
+    is kept, and search jumps back to the level where it becomes unit.
+    Decisions follow variable activity (VSIDS) with phase saving, and
+    search restarts after a growing number of conflicts.
+
+    Clauses can be added between calls to `solve`, and each call can
+    take assumptions: literals that are treated as true for that call
+    only. Learned clauses are kept between calls.
+    """
+
+    RESTART = 100
+    RESTART_GROWTH = 1.5
+    DECAY = 0.95
+
+    def __init__(self, clauses=(), variables=0):
+        self.value = [None]
+        self.level = [0]
+        self.reason = [None]
+        self.activity = [0.0]
+        self.phase = [False]
+        self.order = []
+        self.bump = 1.0
+
+        self.clauses = []
+        self.learned = 0
+        self.watches = dict()
+        self.trail = []
+        self.trail_levels = []
+        self.head = 0
+        self.consistent = True
+        self.model = None
+        self.conflicts = 0
+        self.decisions = 0
+        self.propagations = 0
+
+        self.reserve(variables)
+        for clause in clauses:
+            self.add_clause(clause)
+
+    def reserve(self, variables):
+        """Make sure variables 1 to `variables` exist."""
+        while len(self.value) <= variables:
+            v = len(self.value)
+            self.value.append(None)
+            self.level.append(0)
+            self.reason.append(None)
+            self.activity.append(0.0)
+            self.phase.append(False)
+            self.watches[v] = []
+            self.watches[-v] = []
+            heapq.heappush(self.order, (0.0, v))
+
+    def literal_value(self, literal):
+        """Return True, False, or None (unassigned) for `literal`."""
+        value = self.value[abs(literal)]
+        if value is None:
+            return None
+        return value if literal > 0 else not value
+
+    def decision_level(self):
+        return len(self.trail_levels)
+
+    def assign(self, literal, reason):
+        """Make `literal` true, implied by clause `reason` (or decided)."""
+        v = abs(literal)
+        self.value[v] = literal > 0
+        self.level[v] = self.decision_level()
+        self.reason[v] = reason
+        self.trail.append(literal)
+
+    def add_clause(self, clause):
+        """
+        Add `clause` (a list of literals) to the solver. Return False if
+        the clauses are now known to be unsatisfiable.
+        """
+        self.backtrack(0)
+        clause = list(dict.fromkeys(clause))
+        self.reserve(max((abs(literal) for literal in clause), default=0))
+
+        # Drop clauses that are already satisfied, and false literals
+        if any(-literal in clause for literal in clause):
+            return self.consistent
+        if any(self.literal_value(literal) is True for literal in clause):
+            return self.consistent
+        clause = [l for l in clause if self.literal_value(l) is None]
+
+        if len(clause) == 0:
+            self.consistent = False
+        elif len(clause) == 1:
+            self.assign(clause[0], None)
+            self.consistent = self.consistent and self.propagate() is None
+        else:
+            self.attach(clause)
+        return self.consistent
+
+    def attach(self, clause):
+        """Store `clause`, watching its first two literals."""
+        index = len(self.clauses)
+        self.clauses.append(clause)
+        self.watches[clause[0]].append(index)
+        self.watches[clause[1]].append(index)
+        return index
+
+    def propagate(self):
+        """
+        Propagate the assignments on the trail. Return the index of a
+        conflicting clause, or None if there is no conflict.
+        """
+        while self.head < len(self.trail):
+            false = -self.trail[self.head]
+            self.head += 1
+            self.propagations += 1
+
+            watching = self.watches[false]
+            kept = []
+            k = 0
+            while k < len(watching):
+                index = watching[k]
+                k += 1
+                clause = self.clauses[index]
+
+                # Keep the false literal in the second position
+                if clause[0] == false:
+                    clause[0], clause[1] = clause[1], clause[0]
+
+                # Clause is satisfied by its other watch
+                if self.literal_value(clause[0]) is True:
+                    kept.append(index)
+                    continue
+
+                # Look for a new literal to watch
+                for j in range(2, len(clause)):
+                    if self.literal_value(clause[j]) is not False:
+                        clause[1], clause[j] = clause[j], clause[1]
+                        self.watches[clause[1]].append(index)
+                        break
+                else:
+                    kept.append(index)
+                    if self.literal_value(clause[0]) is False:
+                        kept.extend(watching[k:])
+                        self.watches[false] = kept
+                        return index
+                    self.assign(clause[0], index)
+
+            self.watches[false] = kept
+        return None
+
+    def analyze(self, conflict):
+        """
+        Return the clause learned from conflicting clause `conflict`,
+        with its asserting literal first, and the level to jump back to.
+        """
+        learned = [None]
+        seen = set()
+        pending = 0
+        literal = None
+        position = len(self.trail) - 1
+        clause = self.clauses[conflict]
+
+        while True:
+            for q in clause:
+                if q == literal:
+                    continue
+                v = abs(q)
+                if v in seen or self.level[v] == 0:
+                    continue
+                seen.add(v)
+                self.bump_activity(v)
+                if self.level[v] == self.decision_level():
+                    pending += 1
+                else:
+                    learned.append(q)
+
+            # Walk back to the next literal of this level in the conflict
+            while abs(self.trail[position]) not in seen:
+                position -= 1
+            literal = self.trail[position]
+            position -= 1
+            pending -= 1
+            if pending == 0:
+                break
+            clause = self.clauses[self.reason[abs(literal)]]
+
+        learned[0] = -literal
+        if len(learned) == 1:
+            return learned, 0
+
+        # Watch the literal from the highest remaining level second
+        best = max(range(1, len(learned)), key=lambda k: self.level[abs(learned[k])])
+        learned[1], learned[best] = learned[best], learned[1]
+        return learned, self.level[abs(learned[1])]
+
+    def bump_activity(self, v):
+        """Raise the activity of variable `v`."""
+        self.activity[v] += self.bump
+        if self.activity[v] > 1e100:
+            self.activity = [a * 1e-100 for a in self.activity]
+            self.bump *= 1e-100
+            self.order = [(-self.activity[v], v) for v in range(1, len(self.value))]
+            heapq.heapify(self.order)
+        else:
+            heapq.heappush(self.order, (-self.activity[v], v))
+
+    def backtrack(self, level):
+        """Undo every assignment above decision level `level`."""
+        if self.decision_level() <= level:
+            return
+        start = self.trail_levels[level]
+        for literal in self.trail[start:]:
+            v = abs(literal)
+            self.phase[v] = self.value[v]
+            self.value[v] = None
+            self.reason[v] = None
+            heapq.heappush(self.order, (-self.activity[v], v))
+        del self.trail[start:]
+        del self.trail_levels[level:]
+        self.head = len(self.trail)
+
+    def pick(self):
+        """Return the most active unassigned variable, or None."""
+        while self.order:
+            _, v = heapq.heappop(self.order)
+            if self.value[v] is None:
+                return v
+        return None
+
+    def solve(self, assumptions=()):
+        """
+        Return True if the clauses (with every literal in `assumptions`
+        true) are satisfiable, and False otherwise. If satisfiable,
+        `self.model` maps each variable to its value in a model.
+        """
+        self.model = None
+        self.backtrack(0)
+        if not self.consistent:
+            return False
+        self.reserve(max((abs(literal) for literal in assumptions), default=0))
+        if self.propagate() is not None:
+            self.consistent = False
+            return False
+
+        limit = self.RESTART
+        conflicts = 0
+        while True:
+            conflict = self.propagate()
+            if conflict is not None:
+                self.conflicts += 1
+                conflicts += 1
+                if self.decision_level() == 0:
+                    self.consistent = False
+                    return False
+
+                learned, level = self.analyze(conflict)
+                self.backtrack(level)
+                if len(learned) == 1:
+                    self.assign(learned[0], None)
+                else:
+                    self.learned += 1
+                    self.assign(learned[0], self.attach(learned))
+                self.bump /= self.DECAY
+                continue
+
+            # Restart, keeping everything learned
+            if conflicts >= limit:
+                conflicts = 0
+                limit *= self.RESTART_GROWTH
+                self.backtrack(0)
+                continue
+
+            # Assumptions are the first decisions
+            literal = None
+            while self.decision_level() < len(assumptions):
+                p = assumptions[self.decision_level()]
+                value = self.literal_value(p)
+                if value is True:
+                    self.trail_levels.append(len(self.trail))
+                elif value is False:
+                    self.backtrack(0)
+                    return False
+                else:
+                    literal = p
+                    break
+
+            if literal is None:
+                v = self.pick()
+                if v is None:
+                    self.model = {
+                        v: self.value[v] for v in range(1, len(self.value))
+                    }
+                    self.backtrack(0)
+                    return True
+                literal = v if self.phase[v] else -v
+
+            self.decisions += 1
+            self.trail_levels.append(len(self.trail))
+            self.assign(literal, None)
+
+
+class KnowledgeBase():
+    """
+    Knowledge base that keeps its solver between questions.
+
+    Sentences told to the knowledge base are encoded once, and the
+    solver keeps its clauses, learned clauses and variable activity from
+    one question to the next, so each `tell` or `ask` only costs the
+    work for what is new.
+
+    `push` opens a scope and `pop` retracts everything told since the
+    matching `push`. Clauses told inside a scope carry the negation of
+    an activation variable, which is assumed true while the scope is
+    open and fixed false when it is popped.
+    """
+
+    def __init__(self, *sentences):
+        self.cnf = CNF()
+        self.solver = Solver()
+        self.encoded = 0
+        self.sentences = []
+        self.scopes = []
+        for sentence in sentences:
+            self.tell(sentence)
+
+    def encode(self):
+        """Pass new variables, and clauses defining them, to the solver."""
+        self.solver.reserve(self.cnf.count)
+        for clause in self.cnf.clauses[self.encoded:]:
+            self.solver.add_clause(clause)
+        self.encoded = len(self.cnf.clauses)
+
+    def tell(self, sentence):
+        """Add `sentence` to the knowledge base, in the innermost scope."""
+        clauses = self.cnf.assertion(sentence)
+        self.encode()
+        guard = [-self.scopes[-1][0]] if self.scopes else []
+        for clause in clauses:
+            self.solver.add_clause(clause + guard)
+        self.sentences.append(sentence)
+
+    def push(self):
+        """Open a scope for sentences to be retracted together by `pop`."""
+        self.scopes.append((self.cnf.new_variable(), len(self.sentences)))
+
+    def pop(self):
+        """Retract every sentence told since the matching `push`."""
+        if not self.scopes:
+            raise Exception("pop without matching push")
+        activation, size = self.scopes.pop()
+        self.solver.add_clause([-activation])
+        del self.sentences[size:]
+
+    def assumptions(self, sentences=()):
+        """Return literals assuming open scopes and `sentences` true."""
+        literals = [activation for activation, _ in self.scopes]
+        literals.extend(self.cnf.literal(sentence) for sentence in sentences)
+        self.encode()
+        return literals
+
+    def consistent(self, assumptions=()):
+        """Checks if the knowledge base (with assumptions) has a model."""
+        return self.solver.solve(self.assumptions(assumptions))
+
+    def ask(self, query, assumptions=()):
+        """
+        Checks if the knowledge base entails query, with every sentence
+        in `assumptions` also assumed true for this question only.
+        """
+        literals = self.assumptions(assumptions)
+        literals.append(-self.cnf.literal(query))
+        self.encode()
+        return not self.solver.solve(literals)
+
+    def ask_all(self, queries, assumptions=()):
+        """
+        Checks which of queries the knowledge base entails. Each model
+        found while checking one query also refutes every other query
+        false in it. Returns a list of booleans, one per query.
+        """
+        queries = list(queries)
+        base = self.assumptions(assumptions)
+        literals = [self.cnf.literal(query) for query in queries]
+        self.encode()
+
+        entailed = [None] * len(queries)
+        for k, literal in enumerate(literals):
+            if entailed[k] is not None:
+                continue
+            if not self.solver.solve(base + [-literal]):
+                entailed[k] = True
+                continue
+            model = self.solver.model
+            for j in range(k, len(literals)):
+                value = model[abs(literals[j])]
+                if entailed[j] is None and value != (literals[j] > 0):
+                    entailed[j] = False
+        return entailed
+
+    def knowledge(self):
+        """Returns the conjunction of every sentence currently told."""
+        return And(*self.sentences)
+
+
+def sat_entails(knowledge, query):
+    """
+    Checks if knowledge base entails query, by checking that knowledge
+    and the negation of query cannot both be true.
+    """
+    return KnowledgeBase(knowledge).ask(query)
+
+
+def sat_entails_all(knowledge, queries):
+    """
+    Checks which of queries the knowledge base entails, with one solver
+    for the knowledge base. Returns a list of booleans, one per query.
+    """
+    return KnowledgeBase(knowledge).ask_all(queries)
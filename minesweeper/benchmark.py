@@ -0,0 +1,128 @@
+import multiprocessing
+import random
+import sys
+import time
+
+from minesweeper import Minesweeper, MinesweeperAI
+
+# Default game configuration
+GAMES = 1000
+HEIGHT = 8
+WIDTH = 8
+DENSITY = 0.125
+SEED = 0
+
+# Decision latency percentiles to report
+PERCENTILES = [50, 90, 99]
+
+
+def play_game(height, width, mines, seed):
+    """
+    Play one game of Minesweeper with MinesweeperAI, seeding the random
+    module with `seed`. Return a dictionary of: whether the game was won,
+    the number of moves made, and the seconds the AI took for each move,
+    choosing it and then taking in what it revealed.
+    """
+    random.seed(seed)
+    game = Minesweeper(height=height, width=width, mines=mines)
+    ai = MinesweeperAI(height=height, width=width, mines=mines)
+    safe_cells = height * width - mines
+
+    latencies = []
+    won = False
+    while True:
+        start = time.perf_counter()
+        move = ai.make_safe_move()
+        if move is None:
+            move = ai.make_random_move()
+        if move is None or game.is_mine(move):
+            latencies.append(time.perf_counter() - start)
+            break
+        ai.add_knowledge(move, game.nearby_mines(move))
+        latencies.append(time.perf_counter() - start)
+
+        # Every safe cell is revealed
+        if len(ai.moves_made) == safe_cells:
+            won = True
+            break
+
+    return {
+        "won": won,
+        "moves": len(ai.moves_made),
+        "latencies": latencies
+    }
+
+
+def play_task(task):
+    """Unpack a `(height, width, mines, seed)` task for `play_game`."""
+    return play_game(*task)
+
+
+def percentile(values, p):
+    """Return the `p`-th percentile of sorted `values`."""
+    if not values:
+        return 0.0
+    k = min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))
+    return values[k]
+
+
+def run(games=GAMES, height=HEIGHT, width=WIDTH, density=DENSITY, seed=SEED,
+        processes=None):
+    """
+    Play `games` games on `height` by `width` boards with a fraction
+    `density` of mines, game k seeded with `seed + k`, across a pool of
+    worker processes. Return a dictionary summarizing the games.
+    """
+    mines = max(1, min(height * width - 1, round(density * height * width)))
+    tasks = [(height, width, mines, seed + k) for k in range(games)]
+
+    start = time.perf_counter()
+    with multiprocessing.Pool(processes) as pool:
+        results = list(pool.imap_unordered(play_task, tasks, chunksize=16))
+    elapsed = time.perf_counter() - start
+
+    latencies = sorted(
+        latency for result in results for latency in result["latencies"]
+    )
+    return {
+        "games": games,
+        "height": height,
+        "width": width,
+        "mines": mines,
+        "win_rate": sum(result["won"] for result in results) / games,
+        "moves_per_game": sum(result["moves"] for result in results) / games,
+        "latency": {
+            f"p{p}": percentile(latencies, p) for p in PERCENTILES
+        } | {"max": latencies[-1] if latencies else 0.0},
+        "seconds": elapsed
+    }
+
+
+def main():
+
+    # Check for proper usage
+    if len(sys.argv) not in [1, 5, 6]:
+        sys.exit("Usage: python benchmark.py [games height width density [seed]]")
+    if len(sys.argv) == 1:
+        summary = run()
+    else:
+        summary = run(
+            games=int(sys.argv[1]),
+            height=int(sys.argv[2]),
+            width=int(sys.argv[3]),
+            density=float(sys.argv[4]),
+            seed=int(sys.argv[5]) if len(sys.argv) == 6 else SEED
+        )
+
+    print(f"{summary['games']} games on {summary['height']}x{summary['width']} "
+          f"with {summary['mines']} mines in {summary['seconds']:.2f}s")
+    print(f"Win rate: {summary['win_rate']:.2%}")
+    print(f"Moves per game: {summary['moves_per_game']:.1f}")
+    print("Decision latency: " + ", ".join(
+        f"{name} {seconds * 1000:.3f} ms"
+        for name, seconds in summary["latency"].items()
+    ))
+
+
+if __name__ == "__main__":
+    main()
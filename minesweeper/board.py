@@ -0,0 +1,152 @@
+import sys
+import time
+
+import numpy as np
+
+
+class Board():
+    """
+    Minesweeper game representation backed by NumPy arrays
+
+    Works like Minesweeper, but mines are placed in one draw without
+    replacement, every cell's count of nearby mines is computed up front
+    with one 3x3 box-filter convolution, and `reveal` opens whole regions
+    of cells with no nearby mines at once.
+    """
+
+    def __init__(self, height=8, width=8, mines=8, seed=None):
+
+        # Set initial width, height, and number of mines
+        self.height = height
+        self.width = width
+        self.mine_count = mines
+        rng = np.random.default_rng(seed)
+
+        # Place every mine at once, on distinct cells
+        self.board = np.zeros((height, width), dtype=bool)
+        self.board.flat[rng.choice(height * width, size=mines, replace=False)] = True
+
+        # Count nearby mines for every cell, summing the 3x3 window
+        # around each cell over a zero-padded copy of the board
+        padded = np.pad(self.board, 1).astype(np.uint8)
+        counts = np.zeros((height, width), dtype=np.uint8)
+        for di in range(3):
+            for dj in range(3):
+                counts += padded[di:di + height, dj:dj + width]
+        counts -= self.board
+        self.counts = counts
+
+        # Revealed cells and cells with no nearby mines, on a board with
+        # a one-cell border that counts as already revealed, so flood
+        # fill never steps outside the board
+        self.stride = width + 2
+        self.revealed = np.ones((height + 2) * self.stride, dtype=bool)
+        self.revealed.reshape(height + 2, self.stride)[1:-1, 1:-1] = False
+        self.empty = np.zeros((height + 2) * self.stride, dtype=bool)
+        self.empty.reshape(height + 2, self.stride)[1:-1, 1:-1] = (
+            (counts == 0) & ~self.board
+        )
+        self.offsets = np.array([
+            di * self.stride + dj
+            for di in (-1, 0, 1) for dj in (-1, 0, 1) if (di, dj) != (0, 0)
+        ])
+
+        # At first, player has found no mines
+        self.mines_found = set()
+        self._mines = None
+
+    @property
+    def mines(self):
+        """Set of every mine's cell."""
+        if self._mines is None:
+            self._mines = set(map(tuple, np.argwhere(self.board).tolist()))
+        return self._mines
+
+    def print(self):
+        """
+        Prints a text-based representation
+        of where mines are located.
+        """
+        for i in range(self.height):
+            print("--" * self.width + "-")
+            print("".join("|X" if mine else "| " for mine in self.board[i]) + "|")
+        print("--" * self.width + "-")
+
+    def is_mine(self, cell):
+        i, j = cell
+        return bool(self.board[i, j])
+
+    def nearby_mines(self, cell):
+        """
+        Returns the number of mines that are
+        within one row and column of a given cell,
+        not including the cell itself.
+        """
+        i, j = cell
+        return int(self.counts[i, j])
+
+    def reveal(self, cell):
+        """
+        Reveals a cell. If it has no nearby mines, also reveals every cell
+        around it, repeating from each newly revealed cell with no nearby
+        mines, a whole layer of cells at a time. Returns an array of the
+        newly revealed cells, one `(i, j)` row per cell.
+        """
+        i, j = cell
+        start = (i + 1) * self.stride + (j + 1)
+        if self.revealed[start]:
+            return np.empty((0, 2), dtype=np.intp)
+        self.revealed[start] = True
+
+        layers = [np.array([start])]
+        frontier = layers[0][self.empty[layers[0]]]
+        while frontier.size:
+            neighbors = (frontier[:, np.newaxis] + self.offsets).ravel()
+            neighbors = np.unique(neighbors[~self.revealed[neighbors]])
+            self.revealed[neighbors] = True
+            layers.append(neighbors)
+            frontier = neighbors[self.empty[neighbors]]
+
+        rows, columns = np.divmod(np.concatenate(layers), self.stride)
+        return np.column_stack((rows - 1, columns - 1))
+
+    def is_revealed(self, cell):
+        i, j = cell
+        return bool(self.revealed[(i + 1) * self.stride + (j + 1)])
+
+    def won(self):
+        """
+        Checks if all mines have been flagged.
+        """
+        return self.mines_found == self.mines
+
+
+def main():
+
+    # Check for proper usage
+    if len(sys.argv) not in [4, 5]:
+        sys.exit("Usage: python board.py height width density [seed]")
+    height = int(sys.argv[1])
+    width = int(sys.argv[2])
+    mines = round(float(sys.argv[3]) * height * width)
+    seed = int(sys.argv[4]) if len(sys.argv) == 5 else None
+
+    start = time.perf_counter()
+    board = Board(height, width, mines, seed)
+    print(f"Generated {height}x{width} board with {mines} mines "
+          f"in {(time.perf_counter() - start) * 1000:.2f} ms")
+
+    # Reveal cells with no nearby mines until a tenth of the board is open
+    start = time.perf_counter()
+    revealed = 0
+    for index in np.flatnonzero(board.empty):
+        if revealed * 10 >= height * width:
+            break
+        row, column = divmod(int(index), board.stride)
+        revealed += len(board.reveal((row - 1, column - 1)))
+    print(f"Revealed {revealed} cells "
+          f"in {(time.perf_counter() - start) * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,5 @@
+import collections
+import math
 import random
 
 
@@ -97,6 +99,11 @@ class Sentence():
     def __eq__(self, other):
         return self.cells == other.cells and self.count == other.count
 
+    def __hash__(self):
+        # Sentences change as cells are marked, so a sentence must be
+        # taken out of any set or index before it is marked
+        return hash((frozenset(self.cells), self.count))
+
     def __str__(self):
         return f"{self.cells} = {self.count}"
 
@@ -104,25 +111,17 @@ class Sentence():
         """
         Returns the set of all cells in self.cells known to be mines.
         """
-        mines = set()
-
         if self.count == len(self.cells):
-            for cell in self.cells:
-                mines.add(cell)
-
-        return mines
+            return set(self.cells)
+        return set()
 
     def known_safes(self):
         """
         Returns the set of all cells in self.cells known to be safe.
         """
-        safes = set()
-
         if self.count == 0:
-            for cell in self.cells:
-                safes.add(cell)
-
-        return safes
+            return set(self.cells)
+        return set()
 
     def mark_mine(self, cell):
         """
@@ -142,17 +141,112 @@ class Sentence():
             self.cells.remove(cell)
 
 
+class Knowledge():
+    """
+    Set of sentences about a Minesweeper game, indexed by cell
+
+    Equal sentences are stored once and empty sentences are dropped.
+    Each cell maps to the sentences that mention it, so marking a cell
+    only touches those sentences.
+    """
+
+    def __init__(self):
+        self.sentences = set()
+        self.index = dict()
+
+    def __iter__(self):
+        return iter(self.sentences)
+
+    def __len__(self):
+        return len(self.sentences)
+
+    def __contains__(self, sentence):
+        return sentence in self.sentences
+
+    def add(self, sentence):
+        """
+        Adds a sentence, unless it is empty or already known.
+        Returns whether it was added.
+        """
+        if not sentence.cells or sentence in self.sentences:
+            return False
+        self.sentences.add(sentence)
+        for cell in sentence.cells:
+            self.index.setdefault(cell, set()).add(sentence)
+        return True
+
+    def remove(self, sentence):
+        """
+        Removes a sentence from the knowledge.
+        """
+        self.sentences.discard(sentence)
+        for cell in sentence.cells:
+            sentences = self.index.get(cell)
+            if sentences is not None:
+                sentences.discard(sentence)
+                if not sentences:
+                    del self.index[cell]
+
+    def touching(self, cell):
+        """
+        Returns the set of sentences that mention a cell.
+        """
+        return self.index.get(cell, set())
+
+    def mark(self, cell, mine):
+        """
+        Removes a cell known to be a mine (or safe) from every sentence
+        that mentions it. Returns the sentences still known after the
+        change.
+        """
+        changed = []
+        for sentence in list(self.touching(cell)):
+
+            # Take the sentence out while its hash changes, and put it
+            # back unless it became empty or equal to another
+            self.remove(sentence)
+            if mine:
+                sentence.mark_mine(cell)
+            else:
+                sentence.mark_safe(cell)
+            if self.add(sentence):
+                changed.append(sentence)
+        return changed
+
+    def mark_mine(self, cell):
+        """
+        Updates knowledge given that a cell is a mine.
+        """
+        return self.mark(cell, True)
+
+    def mark_safe(self, cell):
+        """
+        Updates knowledge given that a cell is safe.
+        """
+        return self.mark(cell, False)
+
+
 class MinesweeperAI():
     """
     Minesweeper game player
     """
 
-    def __init__(self, height=8, width=8):
+    # Largest group of linked frontier cells whose mine configurations
+    # are counted exactly; larger groups are sampled
+    MAX_COMPONENT = 100
+
+    # Samples drawn for each sampled group
+    SAMPLES = 500
+
+    def __init__(self, height=8, width=8, mines=None):
 
         # Set initial height and width
         self.height = height
         self.width = width
 
+        # Total number of mines on the board, if known
+        self.total_mines = mines
+
         # Keep track of which cells have been clicked on
         self.moves_made = set()
 
@@ -160,26 +254,26 @@ class MinesweeperAI():
         self.mines = set()
         self.safes = set()
 
-        # List of sentences about the game known to be true
-        self.knowledge = []
+        # Sentences about the game known to be true
+        self.knowledge = Knowledge()
 
     def mark_mine(self, cell):
         """
         Marks a cell as a mine, and updates all knowledge
         to mark that cell as a mine as well.
+        Returns the sentences that changed.
         """
         self.mines.add(cell)
-        for sentence in self.knowledge:
-            sentence.mark_mine(cell)
+        return self.knowledge.mark_mine(cell)
 
     def mark_safe(self, cell):
         """
         Marks a cell as safe, and updates all knowledge
         to mark that cell as safe as well.
+        Returns the sentences that changed.
         """
         self.safes.add(cell)
-        for sentence in self.knowledge:
-            sentence.mark_safe(cell)
+        return self.knowledge.mark_safe(cell)
 
     def add_knowledge(self, cell, count):
         """
@@ -199,7 +293,7 @@ class MinesweeperAI():
 
         # Mark cell as a move made and as safe
         self.moves_made.add(cell)
-        self.mark_safe(cell)
+        pending = self.mark_safe(cell)
 
         # Find all neighboring cells
         neighbors = []
@@ -222,32 +316,57 @@ class MinesweeperAI():
 
         # Add a new sentence containing information on new move's neighbors
         new_sentence = Sentence(neighbors, count - minesCount)
-        self.knowledge.append(new_sentence)
-
-        # Mark any additional cells as safe or mines
-        self.update_knowledge()
+        if self.knowledge.add(new_sentence):
+            pending.append(new_sentence)
 
-        # Add inferences to AI's knowledge base
-        for sentence in self.knowledge:
-            if new_sentence.count == 0 and len(new_sentence.cells) == new_sentence.count:
-                break
-            if sentence.cells.issubset(new_sentence.cells) and sentence and sentence.count != 0 and len(sentence.cells) == sentence.count:
-                inference = Sentence(new_sentence.cells - sentence.cells, new_sentence.count - sentence.count)
-                self.knowledge.append(inference)
+        # Mark cells and add inferences until nothing more follows
+        self.infer(pending)
 
-        self.update_knowledge()
-
-    def update_knowledge(self):
+    def infer(self, pending):
         """
-        Marks any cells in knowledge known to be mines or safes
+        Draws every conclusion that follows from the sentences in
+        `pending`, which are new or changed.
+
+        Each pending sentence either settles its cells as mines or safes,
+        or is compared with the sentences it shares a cell with: when one
+        sentence's cells are a subset of the other's, their difference is
+        a new sentence. New sentences, and sentences changed by marking a
+        cell, are queued in turn until none remain.
         """
-        for sentence in self.knowledge:
-            if sentence.known_mines():
-                for mine in sentence.known_mines():
-                    self.mark_mine(mine)
-            elif sentence.known_safes():
-                for safe in sentence.known_safes():
-                    self.mark_safe(safe)
+        pending = collections.deque(pending)
+        while pending:
+            sentence = pending.popleft()
+            if sentence not in self.knowledge:
+                continue
+
+            # Mark cells the sentence settles
+            mines = sentence.known_mines()
+            safes = sentence.known_safes()
+            if mines or safes:
+                for mine in mines:
+                    pending.extend(self.mark_mine(mine))
+                for safe in safes:
+                    pending.extend(self.mark_safe(safe))
+                continue
+
+            # Subset inference against overlapping sentences only
+            overlapping = set()
+            for cell in sentence.cells:
+                overlapping.update(self.knowledge.touching(cell))
+            overlapping.discard(sentence)
+            for other in overlapping:
+                if other.cells < sentence.cells:
+                    inference = Sentence(
+                        sentence.cells - other.cells, sentence.count - other.count
+                    )
+                elif sentence.cells < other.cells:
+                    inference = Sentence(
+                        other.cells - sentence.cells, other.count - sentence.count
+                    )
+                else:
+                    continue
+                if self.knowledge.add(inference):
+                    pending.append(inference)
 
     def make_safe_move(self):
         """
@@ -272,20 +391,310 @@ class MinesweeperAI():
         Should choose randomly among cells that:
             1) have not already been chosen, and
             2) are not known to be mines
+
+        Among those cells, chooses randomly among the ones least likely
+        to be a mine.
         """
 
         potential_moves = set()
 
         # Finding every cell that is a move not made or currently a mine
-        for i in range(self.width):
-            for j in range(self.height):
+        for i in range(self.height):
+            for j in range(self.width):
                 potential_move = (i, j)
                 if potential_move not in self.moves_made and potential_move not in self.mines:
                     potential_moves.add(potential_move)
 
-        # Return random move if a possible one exists
-        if potential_moves:
-            random_move = random.choice(list(potential_moves))
-            return random_move
-        else:
+        # Return a random move among the safest possible ones
+        if not potential_moves:
             return None
+        probabilities = self.mine_probabilities(potential_moves)
+        lowest = min(probabilities.values())
+        safest = [
+            cell for cell in potential_moves
+            if probabilities[cell] <= lowest + 1e-12
+        ]
+        return random.choice(safest)
+
+    def mine_probabilities(self, cells):
+        """
+        Returns a dictionary mapping each of `cells` (which must not be
+        known mines or moves made) to the probability that it is a mine,
+        given the knowledge and, if known, the total number of mines.
+
+        Cells in sentences (the frontier) are split into components that
+        share no sentence. Each component's mine configurations are
+        counted separately, by number of mines, and the components are
+        then combined with the cells outside the frontier, which share
+        whatever mines are left.
+        """
+        components = []
+        for component_cells, sentences in self.frontier_components():
+            if len(component_cells) <= self.MAX_COMPONENT:
+                components.append(self.count_configurations(component_cells, sentences))
+            else:
+                components.append(self.sample_configurations(component_cells, sentences))
+
+        frontier = set()
+        for component_cells, _ in components:
+            frontier.update(component_cells)
+        interior = [
+            cell for cell in cells if cell not in frontier and cell not in self.safes
+        ]
+
+        # Ways each component can hold each number of mines
+        distributions = [
+            {k: ways for k, (ways, _) in counts.items()} for _, counts in components
+        ]
+        top = sum(max(ways) for ways in distributions)
+
+        # Weight of each number of frontier mines, from the ways the
+        # interior cells can hold the mines left
+        if self.total_mines is None:
+            weights = [1] * (top + 1)
+        else:
+            remaining = self.total_mines - len(self.mines)
+            weights = [
+                math.comb(len(interior), remaining - t)
+                if 0 <= remaining - t <= len(interior) else 0
+                for t in range(top + 1)
+            ]
+
+        # after[c][t]: total weight of the configurations of components c
+        # onwards, given t mines in the components before c
+        after = [weights]
+        for ways in reversed(distributions):
+            later = after[0]
+            after.insert(0, [
+                sum(count * later[t + k] for k, count in ways.items() if t + k <= top)
+                for t in range(top + 1)
+            ])
+        total = after[0][0]
+
+        # before: ways the components before c can hold each number of mines
+        probabilities = dict()
+        before = {0: 1}
+        for c, (component_cells, counts) in enumerate(components):
+            mine_weight = collections.Counter()
+            for k, (_, cell_counts) in counts.items():
+                scale = sum(
+                    ways * after[c + 1][t + k] for t, ways in before.items()
+                )
+                for cell, count in cell_counts.items():
+                    mine_weight[cell] += count * scale
+            for cell in component_cells:
+                probabilities[cell] = mine_weight[cell] / total if total else 0.0
+
+            combined = dict()
+            for t, x in before.items():
+                for k, y in distributions[c].items():
+                    combined[t + k] = combined.get(t + k, 0) + x * y
+            before = combined
+
+        # Interior cells share the mines left over equally
+        if interior:
+            if self.total_mines is None:
+                frontier_probabilities = [probabilities[cell] for cell in frontier]
+                interior_probability = (
+                    sum(frontier_probabilities) / len(frontier_probabilities)
+                    if frontier_probabilities else 0.5
+                )
+            else:
+                expected = sum(
+                    ways * weights[t] * (remaining - t)
+                    for t, ways in before.items()
+                )
+                interior_probability = (
+                    expected / total / len(interior) if total else 0.0
+                )
+            for cell in interior:
+                probabilities[cell] = interior_probability
+
+        for cell in self.safes:
+            probabilities[cell] = 0.0
+        return {cell: probabilities[cell] for cell in cells}
+
+    def frontier_components(self):
+        """
+        Returns a list of `(cells, sentences)` pairs, splitting the
+        knowledge into groups whose sentences share no cell with any
+        other group. Cells are listed in breadth-first order, so cells
+        in the same sentence are close together.
+        """
+        components = []
+        visited = set()
+        for start in self.knowledge.index:
+            if start in visited:
+                continue
+            visited.add(start)
+            cells = []
+            sentences = set()
+            queue = collections.deque([start])
+            while queue:
+                cell = queue.popleft()
+                cells.append(cell)
+                for sentence in self.knowledge.touching(cell):
+                    sentences.add(sentence)
+                    for other in sentence.cells:
+                        if other not in visited:
+                            visited.add(other)
+                            queue.append(other)
+            components.append((cells, list(sentences)))
+        return components
+
+    def count_configurations(self, cells, sentences):
+        """
+        Counts the mine configurations of `cells` consistent with
+        `sentences`. Returns `(cells, counts)`, where `counts` maps each
+        number of mines k to `(ways, cell_counts)`: the number of
+        configurations with k mines, and for each cell the number of
+        those in which it is a mine.
+
+        Cells are assigned in order by backtracking. The configurations
+        of the cells after position i only depend on how many mines each
+        sentence spanning position i still needs, so results are
+        memoized on that.
+        """
+        position = {cell: i for i, cell in enumerate(cells)}
+        needs = [sentence.count for sentence in sentences]
+        spans = [sorted(position[cell] for cell in sentence.cells) for sentence in sentences]
+
+        # Sentences mentioning each cell, with how many of their cells
+        # come later, and sentences spanning each position
+        mentions = [[] for _ in cells]
+        for s, span in enumerate(spans):
+            for k, i in enumerate(span):
+                mentions[i].append((s, len(span) - k - 1))
+        active = [
+            [s for s, span in enumerate(spans) if span[0] < i <= span[-1]]
+            for i in range(len(cells))
+        ]
+
+        memo = dict()
+
+        def count(i):
+            if i == len(cells):
+                return {0: (1, ())}
+            key = (i, tuple(needs[s] for s in active[i]))
+            if key in memo:
+                return memo[key]
+
+            result = dict()
+            for mine in (0, 1):
+                for s, _ in mentions[i]:
+                    needs[s] -= mine
+                if all(0 <= needs[s] <= later for s, later in mentions[i]):
+                    for k, (ways, later_counts) in count(i + 1).items():
+                        cell_counts = (mine * ways,) + later_counts
+                        if k + mine in result:
+                            total, previous = result[k + mine]
+                            result[k + mine] = (
+                                total + ways,
+                                tuple(a + b for a, b in zip(previous, cell_counts))
+                            )
+                        else:
+                            result[k + mine] = (ways, cell_counts)
+                for s, _ in mentions[i]:
+                    needs[s] += mine
+
+            memo[key] = result
+            return result
+
+        counts = {
+            k: (ways, dict(zip(cells, cell_counts)))
+            for k, (ways, cell_counts) in count(0).items()
+        }
+        return cells, counts
+
+    def sample_configurations(self, cells, sentences):
+        """
+        Estimates the counts of `count_configurations` for a group too
+        large to count exactly. Returns `(cells, counts)` in the same
+        form, with estimated counts.
+
+        Each sample assigns the cells in order. At each cell not already
+        forced, it tries both values with unit propagation through the
+        sentences, and picks at random among those that cause no
+        contradiction. The sample is weighted by the product of the
+        number of choices it had, and summed over samples the weights
+        estimate the number of configurations without bias (Knuth's
+        estimator).
+        """
+        mentions = collections.defaultdict(list)
+        for s, sentence in enumerate(sentences):
+            for cell in sentence.cells:
+                mentions[cell].append(s)
+        members = [list(sentence.cells) for sentence in sentences]
+
+        value = dict()
+        needs = []
+        unassigned = []
+        trail = []
+
+        def assign(cell, mine):
+            """Assigns a cell. Returns False on a contradiction."""
+            queue = [(cell, mine)]
+            while queue:
+                cell, mine = queue.pop()
+                if cell in value:
+                    if value[cell] != mine:
+                        return False
+                    continue
+                value[cell] = mine
+                trail.append(cell)
+                for s in mentions[cell]:
+                    needs[s] -= mine
+                    unassigned[s] -= 1
+                    if not 0 <= needs[s] <= unassigned[s]:
+                        return False
+
+                    # The rest of the sentence may now be forced
+                    if unassigned[s] and needs[s] in (0, unassigned[s]):
+                        forced = 1 if needs[s] else 0
+                        for other in members[s]:
+                            if other not in value:
+                                queue.append((other, forced))
+            return True
+
+        def undo(size):
+            """Unassigns cells until the trail is `size` long."""
+            while len(trail) > size:
+                cell = trail.pop()
+                mine = value.pop(cell)
+                for s in mentions[cell]:
+                    needs[s] += mine
+                    unassigned[s] += 1
+
+        counts = dict()
+        for _ in range(self.SAMPLES):
+            value.clear()
+            trail.clear()
+            needs[:] = [sentence.count for sentence in sentences]
+            unassigned[:] = [len(sentence.cells) for sentence in sentences]
+            weight = 1
+            for cell in cells:
+                if cell in value:
+                    continue
+                choices = []
+                for mine in (0, 1):
+                    size = len(trail)
+                    if assign(cell, mine):
+                        choices.append(mine)
+                    undo(size)
+                if not choices:
+                    weight = 0
+                    break
+                weight *= len(choices)
+                assign(cell, random.choice(choices))
+            if weight == 0:
+                continue
+
+            mines = [cell for cell in cells if value[cell]]
+            ways, cell_counts = counts.get(len(mines), (0, dict.fromkeys(cells, 0)))
+            for cell in mines:
+                cell_counts[cell] += weight
+            counts[len(mines)] = (ways + weight, cell_counts)
+
+        if not counts:
+            counts[0] = (0, dict.fromkeys(cells, 0))
+        return cells, counts
@@ -0,0 +1,91 @@
+import contextlib
+import io
+import random
+import sys
+import time
+
+import numpy as np
+
+from nim import train, train_batch
+
+# Default training configuration
+GAMES = 100000
+PILES = [1, 3, 5, 7]
+BATCH = 256
+SEED = 0
+
+
+def winning_states(ai):
+    """
+    Return an array telling, for every state number of `ai`, whether the
+    player to move can force a win. A player who takes the last object
+    loses, so the player to move when every pile is empty has won.
+    """
+    winning = np.zeros(ai.states, dtype=bool)
+    winning[0] = True
+
+    # Every move leads to a smaller state number
+    for state in range(1, ai.states):
+        winning[state] = not winning[ai.results[state, ai.available[state]]].all()
+    return winning
+
+
+def policy_accuracy(ai):
+    """
+    Return the fraction of winning states in which `ai`, choosing its
+    best action, moves to a state the opponent cannot win from.
+    """
+    winning = winning_states(ai)
+    states = np.flatnonzero(winning[1:]) + 1
+    correct = 0
+    for state in states:
+        available = ai.available[state]
+        action = available[ai.q[state, available].argmax()]
+        correct += not winning[ai.results[state, action]]
+    return correct / len(states)
+
+
+def run(games=GAMES, piles=PILES, batch=BATCH, seed=SEED):
+    """
+    Train one AI with `train` and one with `train_batch` on `games` games
+    each, starting from `piles`. Return a dictionary summarizing each
+    trainer's throughput and the accuracy of the policy it learned.
+    """
+    summary = dict()
+    for name, trainer in [
+        ("train", lambda: train(games, piles)),
+        ("train_batch", lambda: train_batch(games, batch, piles, seed))
+    ]:
+        random.seed(seed)
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            ai = trainer()
+        elapsed = time.perf_counter() - start
+        summary[name] = {
+            "seconds": elapsed,
+            "games_per_second": games / elapsed,
+            "accuracy": policy_accuracy(ai)
+        }
+    return summary
+
+
+def main():
+
+    # Check for proper usage
+    if len(sys.argv) == 1:
+        games, piles = GAMES, PILES
+    else:
+        games = int(sys.argv[1])
+        piles = [int(pile) for pile in sys.argv[2:]] or PILES
+    if games < 1 or any(pile < 0 for pile in piles):
+        sys.exit("Usage: python benchmark.py [games [pile ...]]")
+
+    print(f"{games} training games from piles {piles}")
+    for name, result in run(games, piles).items():
+        print(f"{name}: {result['seconds']:.2f}s, "
+              f"{result['games_per_second']:.0f} games per second, "
+              f"best move in {result['accuracy']:.1%} of winning states")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,10 @@
+import itertools
 import math
 import random
 import time
 
+import numpy as np
+
 
 class Nim():
 
@@ -72,20 +75,55 @@ class Nim():
 
 class NimAI():
 
-    def __init__(self, alpha=0.5, epsilon=0.1):
+    def __init__(self, alpha=0.5, epsilon=0.1, initial=[1, 3, 5, 7]):
         """
-        Initialize AI with an empty Q-learning dictionary,
+        Initialize AI with an empty Q-learning table,
         an alpha (learning) rate, and an epsilon rate.
 
-        The Q-learning dictionary maps `(state, action)`
-        pairs to a Q-value (a number).
-         - `state` is a tuple of remaining piles, e.g. (1, 1, 4, 4)
-         - `action` is a tuple `(i, j)` for an action
+        The Q-learning table `q` is an array with a row for every
+        state and a column for every action, holding a Q-value
+        (a number) for each `(state, action)` pair.
+         - A state, e.g. (1, 1, 4, 4), is numbered as a mixed-radix
+           integer whose digits are the piles, pile `i` having
+           `initial[i] + 1` possible sizes
+         - An action `(i, j)` is numbered by its position in `actions`,
+           every action that is available from `initial`
         """
-        self.q = dict()
         self.alpha = alpha
         self.epsilon = epsilon
 
+        # Place values of each pile in a state number
+        self.radices = [pile + 1 for pile in initial]
+        self.weights = [math.prod(self.radices[i + 1:]) for i in range(len(initial))]
+        self.states = math.prod(self.radices)
+
+        # Number every action, and list the actions available in every state
+        self.actions = sorted(Nim.available_actions(initial))
+        self.action_numbers = {
+            action: number for number, action in enumerate(self.actions)
+        }
+        piles = np.array([i for i, _ in self.actions])
+        counts = np.array([j for _, j in self.actions])
+        sizes = np.array(list(itertools.product(
+            *(range(radix) for radix in self.radices)
+        ))).reshape(self.states, len(initial))
+        self.legal = counts <= sizes[:, piles]
+        self.available = [np.flatnonzero(row) for row in self.legal]
+
+        # State reached by taking each action in each state, where legal
+        self.results = (
+            np.arange(self.states)[:, np.newaxis]
+            - counts * np.array(self.weights)[piles]
+        )
+
+        self.q = np.zeros((self.states, len(self.actions)))
+
+    def state_number(self, state):
+        """
+        Return the number of state `state`, a list or tuple of piles.
+        """
+        return sum(pile * weight for pile, weight in zip(state, self.weights))
+
     def update(self, old_state, action, new_state, reward):
         """
         Update Q-learning model, given an old state, an action taken
@@ -99,15 +137,9 @@ class NimAI():
     def get_q_value(self, state, action):
         """
         Return the Q-value for the state `state` and the action `action`.
-        If no Q-value exists yet in `self.q`, return 0.
+        Q-values that have never been updated are 0.
         """
-
-        state = tuple(state)
-
-        if (state, action) in self.q.keys():
-            return self.q[(state, action)]
-
-        return 0
+        return self.q[self.state_number(state), self.action_numbers[action]]
 
     def update_q_value(self, state, action, old_q, reward, future_rewards):
         """
@@ -126,7 +158,7 @@ class NimAI():
         """
 
         updated_q = old_q + self.alpha * ((reward + future_rewards) - old_q)
-        self.q[(tuple(state), action)] = updated_q
+        self.q[self.state_number(state), self.action_numbers[action]] = updated_q
 
     def best_future_reward(self, state):
         """
@@ -134,67 +166,47 @@ class NimAI():
         pairs available in that state and return the maximum of all
         of their Q-values.
 
-        Use 0 as the Q-value if a `(state, action)` pair has no
-        Q-value in `self.q`. If there are no available actions in
-        `state`, return 0.
+        If there are no available actions in `state`, return 0.
         """
-
-        q_values = []
-        actions = list(Nim.available_actions(state))
-        state = tuple(state)
-        for action in actions:
-            if (state, action) in self.q:
-                q_values.append(self.q[(state, action)])
-            else:
-                q_values.append(0)
-
-        if len(q_values) != 0:
-            return max(q_values)
-
-        return 0
-
+        s = self.state_number(state)
+        available = self.available[s]
+        if len(available) == 0:
+            return 0
+        return self.q[s, available].max()
 
     def choose_action(self, state, epsilon=True):
         """
         Given a state `state`, return an action `(i, j)` to take.
 
         If `epsilon` is `False`, then return the best action
-        available in the state (the one with the highest Q-value,
-        using 0 for pairs that have no Q-values).
+        available in the state (the one with the highest Q-value).
 
         If `epsilon` is `True`, then with probability
         `self.epsilon` choose a random available action,
         otherwise choose the best action available.
 
-        If multiple actions have the same Q-value, any of those
-        options is an acceptable return value.
+        If multiple actions have the same Q-value, the first
+        of them in `actions` is returned.
         """
-
-        actions = list(Nim.available_actions(state))
+        s = self.state_number(state)
+        available = self.available[s]
         if epsilon and random.random() <= self.epsilon:
-            return random.choice(actions)
-
-        max_q = self.best_future_reward(state)
-        best_action = None
-        for action in actions:
-            q = self.get_q_value(state, action)
-            if q == max_q:
-                best_action = action
+            return self.actions[random.choice(available)]
 
-        return best_action
+        return self.actions[available[self.q[s, available].argmax()]]
 
 
-def train(n):
+def train(n, initial=[1, 3, 5, 7]):
     """
     Train an AI by playing `n` games against itself.
     """
 
-    player = NimAI()
+    player = NimAI(initial=initial)
 
     # Play n games
     for i in range(n):
         print(f"Playing training game {i + 1}")
-        game = Nim()
+        game = Nim(initial)
 
         # Keep track of last move made by either player
         last = {
@@ -243,6 +255,124 @@ def train(n):
     return player
 
 
+def train_batch(n, batch=256, initial=[1, 3, 5, 7], seed=None):
+    """
+    Train an AI by playing `n` games against itself, `batch` games at
+    a time. Each step makes one move in every game in progress, choosing
+    moves and updating Q-values for all of them with array operations,
+    and starts a new game in place of each game that finished.
+
+    Updates follow the same rules as `train`. Games in one step that
+    update the same `(state, action)` pair all estimate future rewards
+    from the Q-values as they were before the step, and their updates
+    are then applied one after another.
+    """
+
+    player = NimAI(initial=initial)
+    rng = np.random.default_rng(seed)
+    start = player.state_number(initial)
+    start_time = time.perf_counter()
+
+    def best_future_rewards(states):
+        """Return `best_future_reward` of each of `states`."""
+        q = np.where(player.legal[states], player.q[states], -np.inf)
+        return np.where(states == 0, 0, q.max(axis=1))
+
+    def update(states, actions, reward, future_rewards):
+        """
+        Update the Q-value of each `(state, action)` pair. A pair updated
+        `k` times ends up as if its updates were made one after another:
+        the old value is scaled by `(1 - alpha) ** k`, and the update made
+        `r` updates before the last adds its estimate times
+        `alpha * (1 - alpha) ** r`.
+        """
+        pairs, group, repeats = np.unique(
+            states * len(player.actions) + actions,
+            return_inverse=True, return_counts=True
+        )
+        order = np.argsort(group, kind="stable")
+        rank = np.empty_like(order)
+        rank[order] = np.arange(order.size) - np.repeat(
+            np.cumsum(repeats) - repeats, repeats
+        )
+        decay = 1 - player.alpha
+        estimates = player.alpha * decay ** (repeats[group] - 1 - rank) * (
+            reward + future_rewards
+        )
+        q = player.q.reshape(-1)
+        q[pairs] = decay ** repeats * q[pairs] + np.bincount(
+            group, estimates, minlength=pairs.size
+        )
+
+    # Games in progress, each game's piles as a state number, the player
+    # to move, and the last state and action of each player in each game
+    games = np.arange(min(batch, n))
+    state = np.full(games.size, start)
+    mover = np.zeros(games.size, dtype=int)
+    last_state = np.full((2, games.size), -1)
+    last_action = np.zeros((2, games.size), dtype=int)
+    started = games.size
+
+    # Game loop
+    while games.size:
+
+        # Choose actions, at random with probability epsilon
+        states = state[games]
+        movers = mover[games]
+        legal = player.legal[states]
+        best = np.where(legal, player.q[states], -np.inf).argmax(axis=1)
+        explore = np.where(legal, rng.random(legal.shape), -1).argmax(axis=1)
+        actions = np.where(
+            rng.random(games.size) <= player.epsilon, explore, best
+        )
+        last_state[movers, games] = states
+        last_action[movers, games] = actions
+
+        # Make moves
+        new_states = player.results[states, actions]
+        future_rewards = best_future_rewards(new_states)
+        over = new_states == 0
+        others = 1 - movers
+        previous = last_state[others, games] >= 0
+
+        # When game is over, update Q values with rewards
+        update(states[over], actions[over], -1, future_rewards[over])
+        won = over & previous
+        update(
+            last_state[others[won], games[won]],
+            last_action[others[won], games[won]],
+            1,
+            future_rewards[won]
+        )
+
+        # If game is continuing, no rewards yet
+        going = ~over & previous
+        update(
+            last_state[others[going], games[going]],
+            last_action[others[going], games[going]],
+            0,
+            future_rewards[going]
+        )
+        state[games] = new_states
+        mover[games] = others
+
+        # Start a new game in place of each finished one, while any remain
+        finished = games[over]
+        restarted = finished[:max(0, n - started)]
+        started += restarted.size
+        state[restarted] = start
+        mover[restarted] = 0
+        last_state[:, restarted] = -1
+        games = np.concatenate((games[~over], restarted))
+
+    elapsed = time.perf_counter() - start_time
+    print(f"Done training {n} games in {elapsed:.2f}s "
+          f"({n / elapsed:.0f} games per second)")
+
+    # Return the trained AI
+    return player
+
+
 def play(ai, human_player=None):
     """
     Play human game against the AI.